@@ -3,6 +3,27 @@ import random
 import sys
 import os
 import math
+import time
+import argparse
+from collections import deque
+from building_registry import BuildingRegistry
+from nearest_raster import NearestRaster
+from sprite_cache import RotatedSpriteCache
+from render_layers import StaticBackground, DirtyRectPresenter
+from hud import TextCache, HudPanel
+from colony_stats import ColonyStats
+from fixed_timestep import FixedTimestep, SPEED_MULTIPLIERS
+from seeding import RandomStreams
+from assets import AssetManager
+from world_gen import RectGrid, PoissonDisk
+from frame_profiler import FrameProfiler, NULL_PROFILER, OVERLAY_SIZE
+from camera import Camera
+from terrain import TerrainMap
+from job_board import JobBoard
+from commute import CommuteScheduler
+from entity_pool import EntityPool
+from capacity import CapacityIndex
+from ant_grid import AntGrid
 
 pygame.init()
 
@@ -10,6 +31,9 @@ WIDTH, HEIGHT = 1200, 900
 FPS = 60
 ANT_COUNT = 30
 RESOURCE_FONT = pygame.font.SysFont("Arial", 20)
+SMALL_FONT = pygame.font.SysFont("Arial", 14)
+RESOURCE_TEXT = TextCache(RESOURCE_FONT)
+SMALL_TEXT = TextCache(SMALL_FONT)
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -23,154 +47,240 @@ DARK_BROWN = (100, 50, 10)
 SAND = (240, 230, 140)
 PINK = (255, 180, 220)
 
-resources = {"food": 500, "wood": 500, "fish": 500}
-
-ANT_ADULT_IMG = pygame.image.load(os.path.join('assets', 'ant_adult.png'))
-ANT_CHILD_IMG = pygame.image.load(os.path.join('assets', 'ant_child.png'))
-ANT_ADULT_IMG = pygame.transform.scale(ANT_ADULT_IMG, (48, 48))
-ANT_CHILD_IMG = pygame.transform.scale(ANT_CHILD_IMG, (32, 32))
-
-BUILDING_ICONS = {
-    "hub": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'hub.png')), (24, 24)),
-    "lumber camp": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'lumber_camp.png')), (24, 24)),
-    "fishing hut": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'fishing_hut.png')), (24, 24)),
-    "school": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'school.png')), (24, 24)),
-    "bonfire": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'campfire.png')), (24, 24)),
-    "home": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'home.png')), (24, 24)),
-    "base": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'castle.png')), (24, 24)),
-}
+STARTING_RESOURCES = {"food": 500, "wood": 500, "fish": 500}
 
-BUILDING_IMAGES = {
-    "hub": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'hub.png')), (48, 48)),
-    "lumber camp": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'lumber_camp.png')), (48, 48)),
-    "fishing hut": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'fishing_hut.png')), (48, 48)),
-    "school": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'school.png')), (48, 48)),
-    "bonfire": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'campfire.png')), (48, 48)),
-    "home": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'home.png')), (48, 48)),
-    "base": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'castle.png')), (48, 48)),
+BUILDING_FILES = {
+    "hub": "hub.png",
+    "lumber camp": "lumber_camp.png",
+    "fishing hut": "fishing_hut.png",
+    "school": "school.png",
+    "bonfire": "campfire.png",
+    "home": "home.png",
+    "base": "castle.png",
 }
 
-FOOD_ICON = pygame.transform.scale(pygame.image.load(os.path.join('assets', 'food.png')), (24, 24))
-WOOD_ICON = pygame.transform.scale(pygame.image.load(os.path.join('assets', 'wood.png')), (24, 24))
+ASSETS = AssetManager({
+    "ants": {"adult": ("ant_adult.png", (48, 48)), "child": ("ant_child.png", (32, 32))},
+    "building_icons": {t: (f, (24, 24)) for t, f in BUILDING_FILES.items()},
+    "building_images": {t: (f, (48, 48)) for t, f in BUILDING_FILES.items()},
+    "resource_icons": {"food": ("food.png", (24, 24)), "wood": ("wood.png", (24, 24))},
+})
+ANT_ROTATION_STEPS = 64
+ANT_ADULT_SPRITES = RotatedSpriteCache(ASSETS["ants"]["adult"], ANT_ROTATION_STEPS)
+ANT_CHILD_SPRITES = RotatedSpriteCache(ASSETS["ants"]["child"], ANT_ROTATION_STEPS)
+BUILDING_ICONS = ASSETS["building_icons"]
+BUILDING_IMAGES = ASSETS["building_images"]
+RESOURCE_ICONS = ASSETS["resource_icons"]
+
+# Ant behaviour states; the first four index ANT_HANDLERS.
+GATHERING, HAULING, RESTING, EATING, STUDYING = range(5)
+
+CARRY_NONE = 0
+CARRY_FOOD = 1
+CARRY_WOOD = 2
+CARRY_FISH = 3
+CARRY_CODES = {"food": CARRY_FOOD, "wood": CARRY_WOOD, "fish": CARRY_FISH}
+CARRY_NAMES = {code: name for name, code in CARRY_CODES.items()}
+# Ticks a commute stops short of the hunger and stamina thresholds.
+COMMUTE_MARGIN = 2
 
 class Ant:
+    __slots__ = (
+        "x", "y", "speed", "target", "carrying", "stamina", "hunger", "state", "resume",
+        "unhappy_ticks", "age", "is_adult", "experience", "school_target",
+        "last_dx", "last_dy", "commute", "home", "handle",
+    )
+
     def __init__(self, x, y, is_adult=False):
         self.x = x
         self.y = y
         self.speed = 1 if is_adult else 0.5
         self.target = None
-        self.carrying = None
+        self.carrying = CARRY_NONE
         self.stamina = 100
-        self.resting = False
-        self.need_food = False
         self.hunger = 0
-        self.eating = False
+        self.state = GATHERING
+        # State to go back to once EATING or STUDYING ends.
+        self.resume = GATHERING
         self.unhappy_ticks = 0
         self.age = 0
         self.is_adult = is_adult
         self.experience = 0
-        self.at_school = False
         self.school_target = None
         self.last_dx = 0
         self.last_dy = -1
+        self.commute = None
+        # Handle of the home this ant has a place in, if any.
+        self.home = None
+        self.handle = None
 
-    def update(self, food_sources, lumber_areas, water_areas, buildings, schools_state):
+    def update(self, buildings, slots, resources, jobs):
         self.age += 1 / FPS
-        if not self.is_adult and self.experience >= 200:
-            self.is_adult = True
-            self.speed = 1
-            self.at_school = False
-            self.school_target = None
-
         if not self.is_adult:
-            if not self.at_school:
-                available_schools = [b for b in buildings if b.type == "school" and schools_state.get(id(b), 0) < 5]
-                if available_schools:
-                    closest = min(available_schools, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                    self.school_target = closest
-                    self.move_towards(closest.x, closest.y)
-                    if abs(self.x - closest.x) < 5 and abs(self.y - closest.y) < 5:
-                        self.at_school = True
-                        schools_state[id(closest)] = schools_state.get(id(closest), 0) + 1
-                        return
-                else:
-                    self.school_target = None
-            else:
+            if self.experience >= 200:
+                self._graduate(slots)
+            elif self.state == STUDYING:
                 self.experience += 0.1
                 return
+            elif self._walk_to_school(buildings, slots):
+                return
 
         self.hunger += 0.01
         if self.hunger > 100:
             self.hunger = 100
 
-        if self.hunger >= 70 or self.eating:
-            food_buildings = [b for b in buildings if b.type == "home"]
-            if resources["food"] > 0 or resources["fish"] > 0:
-                food_buildings += [b for b in buildings if b.type == "fishing hut"]
-            if food_buildings:
-                closest = min(food_buildings, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                self.move_towards(closest.x, closest.y)
-                if abs(self.x - closest.x) < 5 and abs(self.y - closest.y) < 5:
-                    if resources["food"] > 0:
-                        resources["food"] -= 1
-                        self.hunger = max(0, self.hunger - 15)
-                        self.eating = False
-                    elif resources["fish"] > 0:
-                        resources["fish"] -= 1
-                        self.hunger = max(0, self.hunger - 15)
-                        self.eating = False
-                    else:
-                        self.eating = True
-                else:
-                    self.eating = True
-                return
+        state = self.state
+        if self.hunger >= 70 and state != EATING:
+            self.resume = state
+            state = self.state = EATING
+        elif state <= HAULING:
+            if self.stamina <= 20:
+                state = self.state = RESTING
             else:
-                self.eating = True
-                return
-        else:
-            self.eating = False
-
-        if self.stamina <= 20:
-            self.resting = True
-        if self.resting:
-            hub = next((b for b in buildings if b.type == "hub"), None)
-            if hub:
-                self.move_towards(hub.x, hub.y)
-                if abs(self.x - hub.x) < 5 and abs(self.y - hub.y) < 5:
-                    self.stamina = min(100, self.stamina + 3)
-                    if self.stamina >= 80:
-                        self.resting = False
-                    return
+                self.stamina -= 0.01
+        ANT_HANDLERS[state](self, buildings, resources, jobs)
+
+    def _graduate(self, slots):
+        self.is_adult = True
+        self.speed = 1
+        self.leave_school(slots)
+        if self.state == STUDYING:
+            self.state = self.resume
+
+    def leave_school(self, slots):
+        if self.school_target is not None:
+            slots.release(self.school_target)
+            self.school_target = None
+
+    def _walk_to_school(self, buildings, slots):
+        # Children reserve a place at the nearest school with room and head
+        # there, doing their other chores on the way; returns True once they
+        # arrive. The reservation is kept until they graduate or die.
+        if self.school_target is None:
+            self.school_target = slots.claim_nearest("school", self.x, self.y)
+            if self.school_target is None:
+                return False
+        school = buildings.get(self.school_target)
+        self.move_towards(school.x, school.y)
+        if abs(self.x - school.x) < 5 and abs(self.y - school.y) < 5:
+            # Hunger is checked again after graduating, so only what was
+            # underneath EATING needs remembering.
+            if self.state != EATING:
+                self.resume = self.state
+            self.state = STUDYING
+            return True
+        return False
+
+    def _eat(self, buildings, resources, jobs):
+        food_types = ("home",)
+        if resources["food"] > 0 or resources["fish"] > 0:
+            food_types = ("home", "fishing hut")
+        closest = buildings.nearest(food_types, self.x, self.y)
+        if not closest:
+            return
+        self.move_towards(closest.x, closest.y)
+        if abs(self.x - closest.x) < 5 and abs(self.y - closest.y) < 5:
+            if resources["food"] > 0:
+                resources["food"] -= 1
+            elif resources["fish"] > 0:
+                resources["fish"] -= 1
             else:
-                self.stamina = min(100, self.stamina + 1)
                 return
+            self.hunger = max(0, self.hunger - 15)
+            self.state = self.resume
+
+    def _rest(self, buildings, resources, jobs):
+        hub = buildings.first("hub")
+        if not hub:
+            self.stamina = min(100, self.stamina + 1)
+            return
+        self.move_towards(hub.x, hub.y)
+        if abs(self.x - hub.x) < 5 and abs(self.y - hub.y) < 5:
+            self.stamina = min(100, self.stamina + 3)
+            if self.stamina >= 80:
+                self.state = HAULING if self.carrying else GATHERING
+            return
+        # Until it reaches the hub a tired ant keeps at its job as well.
+        if self.carrying:
+            self._haul(buildings, resources, jobs)
         else:
-            self.stamina -= 0.01
-
+            self._gather(buildings, resources, jobs)
+
+    def _haul(self, buildings, resources, jobs):
+        drop_x, drop_y = self.drop_off(buildings)
+        self.move_towards(drop_x, drop_y)
+        if abs(self.x - drop_x) < 5 and abs(self.y - drop_y) < 5:
+            resources[CARRY_NAMES[self.carrying]] += 1
+            self.carrying = CARRY_NONE
+            if self.state == HAULING:
+                self.state = GATHERING
+
+    def _gather(self, buildings, resources, jobs):
+        if self.target is None:
+            # dispatch() hands out a source and walks this tick's step.
+            jobs.request(self)
+            return
+        self.walk_to_target(jobs)
+
+    def walk_to_target(self, jobs):
+        self.move_towards(self.target.x, self.target.y)
+        if abs(self.x - self.target.x) < 5 and abs(self.y - self.target.y) < 5:
+            self.carrying = CARRY_CODES[self.target.type]
+            jobs.release(self)
+            if self.state == GATHERING:
+                self.state = HAULING
+
+    def drop_off(self, buildings):
+        base = buildings.first("base")
+        drop_x, drop_y = base.x, base.y
+        if self.carrying == CARRY_FISH:
+            closest = buildings.nearest("fishing hut", self.x, self.y)
+            if closest:
+                drop_x, drop_y = closest.x, closest.y
+        elif self.carrying == CARRY_WOOD:
+            closest = buildings.nearest("lumber camp", self.x, self.y)
+            if closest:
+                drop_x, drop_y = closest.x, closest.y
+        return drop_x, drop_y
+
+    def plan_commute(self, buildings, slots):
+        # How many of the following update() calls would only walk this
+        # ant towards its target or drop-off, and what they change per
+        # tick; None if something could happen sooner. Mirrors update():
+        # hungry at 70, resting at 20, arriving within 5 on both axes.
+        # Children only qualify while no school has room for them.
+        if self.state > HAULING or not self.is_happy():
+            return None
+        if not self.is_adult and (self.school_target is not None or slots.free("school")):
+            return None
         if self.carrying:
-            drop_x, drop_y = 600, 450
-            if self.carrying == "fish":
-                huts = [b for b in buildings if b.type == "fishing hut"]
-                if huts:
-                    closest = min(huts, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                    drop_x, drop_y = closest.x, closest.y
-            elif self.carrying == "wood":
-                camps = [b for b in buildings if b.type == "lumber camp"]
-                if camps:
-                    closest = min(camps, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                    drop_x, drop_y = closest.x, closest.y
-            self.move_towards(drop_x, drop_y)
-            if abs(self.x - drop_x) < 5 and abs(self.y - drop_y) < 5:
-                resources[self.carrying] += 1
-                self.carrying = None
+            tx, ty = self.drop_off(buildings)
+        elif self.target is not None:
+            tx, ty = self.target.x, self.target.y
         else:
-            if self.is_adult or not self.carrying:
-                if self.target is None or random.random() < 0.01:
-                    all_sources = food_sources + lumber_areas + water_areas
-                    self.target = random.choice(all_sources)
-                self.move_towards(self.target.x, self.target.y)
-                if abs(self.x - self.target.x) < 5 and abs(self.y - self.target.y) < 5:
-                    self.carrying = self.target.type
+            return None
+        # update() accumulates 0.01 a tick, which can reach a threshold a
+        # tick before or after the exact quotient says, so stop short of it.
+        ticks = min(math.ceil((70 - self.hunger) / 0.01), math.ceil((self.stamina - 20) / 0.01)) - 1 - COMMUTE_MARGIN
+        dx, dy = tx - self.x, ty - self.y
+        dist = max(1, (dx**2 + dy**2)**0.5)
+        steps = 1
+        for d in (dx, dy):
+            if abs(d) >= 5:
+                steps = max(steps, int(dist / self.speed * (1 - 5 / abs(d))) + 1)
+        ticks = min(ticks, steps - 1)
+        if ticks < 1:
+            return None
+        self.last_dx = dx / dist
+        self.last_dy = dy / dist
+        rates = {
+            "x": self.speed * dx / dist,
+            "y": self.speed * dy / dist,
+            "hunger": 0.01,
+            "stamina": -0.01,
+            "age": 1 / FPS,
+        }
+        return ticks, rates
 
     def move_towards(self, tx, ty):
         dx, dy = tx - self.x, ty - self.y
@@ -181,60 +291,74 @@ class Ant:
             self.last_dx = dx / dist
             self.last_dy = dy / dist
 
-    def draw(self, screen):
-        angle = math.degrees(math.atan2(-self.last_dx, -self.last_dy))
+    def draw(self, screen, ox=0, oy=0):
+        cx, cy = int(self.x - ox), int(self.y - oy)
         if self.is_adult:
-            rotated_img = pygame.transform.rotate(ANT_ADULT_IMG, angle)
-            rect = rotated_img.get_rect(center=(int(self.x), int(self.y)))
-            screen.blit(rotated_img, rect.topleft)
-            pygame.draw.rect(screen, RED, (rect.centerx-16, rect.top-10, 32, 4))
-            pygame.draw.rect(screen, GREEN, (rect.centerx-16, rect.top-10, int(32*self.stamina/100), 4))
+            rotated_img, (sx, sy) = ANT_ADULT_SPRITES.frame(self.last_dx, self.last_dy)
+            rect = screen.blit(rotated_img, (cx + sx, cy + sy))
+            bar = pygame.draw.rect(screen, RED, (cx-16, cy+sy-10, 32, 4))
+            pygame.draw.rect(screen, GREEN, (cx-16, cy+sy-10, int(32*self.stamina/100), 4))
         else:
-            rotated_img = pygame.transform.rotate(ANT_CHILD_IMG, angle)
-            rect = rotated_img.get_rect(center=(int(self.x), int(self.y)))
-            screen.blit(rotated_img, rect.topleft)
-            pygame.draw.rect(screen, RED, (rect.centerx-12, rect.top-8, 24, 3))
-            pygame.draw.rect(screen, GREEN, (rect.centerx-12, rect.top-8, int(24*self.stamina/100), 3))
+            rotated_img, (sx, sy) = ANT_CHILD_SPRITES.frame(self.last_dx, self.last_dy)
+            rect = screen.blit(rotated_img, (cx + sx, cy + sy))
+            bar = pygame.draw.rect(screen, RED, (cx-12, cy+sy-8, 24, 3))
+            pygame.draw.rect(screen, GREEN, (cx-12, cy+sy-8, int(24*self.stamina/100), 3))
+        return rect.union(bar)
 
     def is_happy(self):
         return self.hunger < 80 and self.stamina > 20
 
+ANT_HANDLERS = (Ant._gather, Ant._haul, Ant._rest, Ant._eat)
+
 class FoodSource:
     def __init__(self, x, y, type="food"):
         self.x = x
         self.y = y
         self.type = type
 
-    def draw(self, screen):
+    def draw(self, screen, ox=0, oy=0):
+        x, y = self.x - ox, self.y - oy
         if self.type == "food":
-            screen.blit(FOOD_ICON, (self.x-12, self.y-12))
+            screen.blit(RESOURCE_ICONS["food"], (x-12, y-12))
         elif self.type == "wood":
-            screen.blit(WOOD_ICON, (self.x-12, self.y-12))
+            screen.blit(RESOURCE_ICONS["wood"], (x-12, y-12))
         elif self.type == "fish":
-            pygame.draw.circle(screen, AQUA, (self.x, self.y), 6)
+            pygame.draw.circle(screen, AQUA, (x, y), 6)
 
 class Area:
-    def __init__(self, x, y, w, h, type):
+    def __init__(self, x, y, w, h, type, rng=random):
         self.x = x
         self.y = y
         self.w = w
         self.h = h
         self.type = type
-        self.points = self.generate_blob(x, y, w, h)
-        self.rect = pygame.Rect(min(p[0] for p in self.points), min(p[1] for p in self.points),max(p[0] for p in self.points)-min(p[0] for p in self.points),max(p[1] for p in self.points)-min(p[1] for p in self.points))
-
-    def generate_blob(self, x, y, w, h, n=10):
+        self.points = self.generate_blob(x, y, w, h, rng=rng)
+        self.rect = bounding_rect(self.points)
+
+    @classmethod
+    def from_points(cls, x, y, w, h, type, points):
+        area = cls.__new__(cls)
+        area.x = x
+        area.y = y
+        area.w = w
+        area.h = h
+        area.type = type
+        area.points = points
+        area.rect = bounding_rect(points)
+        return area
+
+    def generate_blob(self, x, y, w, h, n=10, rng=random):
         center = (x + w//2, y + h//2)
         points = []
         for i in range(n):
             angle = 2 * math.pi * i / n
-            radius = random.uniform(0.4, 1.0) * min(w, h) // 2
-            px = int(center[0] + radius * math.cos(angle) + random.randint(-8, 8))
-            py = int(center[1] + radius * math.sin(angle) + random.randint(-8, 8))
+            radius = rng.uniform(0.4, 1.0) * min(w, h) // 2
+            px = int(center[0] + radius * math.cos(angle) + rng.randint(-8, 8))
+            py = int(center[1] + radius * math.sin(angle) + rng.randint(-8, 8))
             points.append((px, py))
         return points
 
-    def draw(self, screen):
+    def draw(self, screen, ox=0, oy=0):
         color_map = {
             "water": AQUA,
             "lumber": DARK_BROWN,
@@ -244,21 +368,26 @@ class Area:
             "grass": GREEN,
         }
         color = color_map.get(self.type, WHITE)
-        pygame.draw.polygon(screen, color, self.points)
+        points = self.points if not (ox or oy) else [(x - ox, y - oy) for x, y in self.points]
+        pygame.draw.polygon(screen, color, points)
 
 class Building:
+    __slots__ = ("x", "y", "type", "handle")
+
     def __init__(self, x, y, type):
         self.x = x
         self.y = y
         self.type = type
+        self.handle = None
 
-    def draw(self, screen):
+    def draw(self, screen, ox=0, oy=0):
+        x, y = self.x - ox, self.y - oy
         img = BUILDING_IMAGES.get(self.type)
         if img:
-            rect = img.get_rect(center=(self.x, self.y))
+            rect = img.get_rect(center=(x, y))
             screen.blit(img, rect.topleft)
         else:
-            pygame.draw.rect(screen, BLACK, (self.x - 10, self.y - 10, 20, 20))
+            pygame.draw.rect(screen, BLACK, (x - 10, y - 10, 20, 20))
 
 class Queen:
     def __init__(self, x, y):
@@ -268,7 +397,7 @@ class Queen:
         self.lay_timer = 0
         self.status = "healthy"
 
-    def update(self, ants):
+    def update(self, ants, resources):
         self.hunger += 0.005
         if self.hunger > 100:
             self.hunger = 100
@@ -287,76 +416,59 @@ class Queen:
     def can_lay(self):
         return self.hunger < 70
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, (200, 0, 0), (int(self.x), int(self.y)), 10)
-        pygame.draw.ellipse(screen, YELLOW, (int(self.x)-8, int(self.y)-16, 16, 8))
-
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Idle Ant Colony")
-clock = pygame.time.Clock()
-
-ants = []
-for _ in range(ANT_COUNT // 2):
-    ants.append(Ant(WIDTH//2, HEIGHT//2, is_adult=True))
-for _ in range(ANT_COUNT - len(ants)):
-    ants.append(Ant(WIDTH//2, HEIGHT//2, is_adult=False))
-
-areas = []
-base_x, base_y = WIDTH//2, HEIGHT//2
-base_rect = pygame.Rect(base_x-40, base_y-40, 80, 80)
-
-def overlaps_any(rect, area_list):
-    for a in area_list:
-        if rect.colliderect(a.rect):
-            return True
-    return False
-
-for _ in range(random.randint(4, 8)):
-    for _ in range(30):
-        wx = random.randint(0, WIDTH-200)
-        wy = random.randint(0, HEIGHT-200)
-        ww = random.randint(100, 250)
-        wh = random.randint(80, 180)
-        temp_area = Area(wx, wy, ww, wh, "water")
-        if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
-            areas.append(temp_area)
-            break
-for _ in range(random.randint(3, 6)):
-    for _ in range(30):
-        mx = random.randint(0, WIDTH-180)
-        my = random.randint(0, HEIGHT-180)
-        mw = random.randint(80, 180)
-        mh = random.randint(80, 180)
-        temp_area = Area(mx, my, mw, mh, "mountain")
-        if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
-            areas.append(temp_area)
-            break
-for _ in range(random.randint(2, 4)):
-    for _ in range(30):
-        sx = random.randint(0, WIDTH-150)
-        sy = random.randint(0, HEIGHT-150)
-        sw = random.randint(80, 150)
-        sh = random.randint(60, 120)
-        temp_area = Area(sx, sy, sw, sh, "sand")
-        if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
-            areas.append(temp_area)
-            break
-for _ in range(random.randint(2, 4)):
-    for _ in range(30):
-        fx = random.randint(0, WIDTH-120)
-        fy = random.randint(0, HEIGHT-120)
-        fw = random.randint(60, 120)
-        fh = random.randint(60, 120)
-        temp_area = Area(fx, fy, fw, fh, "flowers")
-        if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
-            areas.append(temp_area)
-            break
-
-food_sources = [FoodSource(random.randint(50, WIDTH-50), random.randint(50, HEIGHT-50), random.choice(["food"])) for _ in range(25)]
-lumber_areas = [FoodSource(random.randint(100, WIDTH-100), random.randint(100, HEIGHT-100), "wood") for _ in range(15)]
-water_areas = [FoodSource(random.randint(100, WIDTH-100), random.randint(100, HEIGHT-100), "fish") for _ in range(15)]
-
-buildings = [Building(WIDTH//2, HEIGHT//2, "base")]
+    def draw(self, screen, ox=0, oy=0):
+        x, y = int(self.x - ox), int(self.y - oy)
+        body = pygame.draw.circle(screen, (200, 0, 0), (x, y), 10)
+        crown = pygame.draw.ellipse(screen, YELLOW, (x-8, y-16, 16, 8))
+        return body.union(crown)
+
+def bounding_rect(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    left, top = min(xs), min(ys)
+    return pygame.Rect(left, top, max(xs)-left, max(ys)-top)
+
+# type, count range per 1200x900 of map, margin kept free at the right and
+# bottom edges, width range and height range.
+AREA_KINDS = [
+    ("water", (4, 8), 200, (100, 250), (80, 180)),
+    ("mountain", (3, 6), 180, (80, 180), (80, 180)),
+    ("sand", (2, 4), 150, (80, 150), (60, 120)),
+    ("flowers", (2, 4), 120, (60, 120), (60, 120)),
+]
+SOURCE_KINDS = [("food", 25, 50), ("wood", 15, 100), ("fish", 15, 100)]
+SOURCE_SPACING = 24
+
+def map_scale(width, height):
+    return width * height / (WIDTH * HEIGHT)
+
+def generate_areas(width=WIDTH, height=HEIGHT, rng=random):
+    scale = map_scale(width, height)
+    areas = []
+    grid = RectGrid()
+    grid.add(pygame.Rect(width//2-40, height//2-40, 80, 80))
+    for area_type, (low, high), margin, (min_w, max_w), (min_h, max_h) in AREA_KINDS:
+        for _ in range(rng.randint(max(1, round(low * scale)), max(1, round(high * scale)))):
+            for _ in range(30):
+                x = rng.randint(0, width-margin)
+                y = rng.randint(0, height-margin)
+                w = rng.randint(min_w, max_w)
+                h = rng.randint(min_h, max_h)
+                temp_area = Area(x, y, w, h, area_type, rng=rng)
+                if not grid.collides(temp_area.rect):
+                    grid.add(temp_area.rect)
+                    areas.append(temp_area)
+                    break
+    return areas
+
+def generate_sources(width=WIDTH, height=HEIGHT, rng=random):
+    scale = map_scale(width, height)
+    disk = PoissonDisk(SOURCE_SPACING)
+    sources = []
+    for source_type, count, margin in SOURCE_KINDS:
+        points = disk.sample(max(1, round(count * scale)), margin, margin, width-margin, height-margin, rng)
+        sources.append([FoodSource(x, y, source_type) for x, y in points])
+    return tuple(sources)
 
 building_costs = {
     "base": {"food": 0, "wood": 0},
@@ -373,13 +485,240 @@ if "gather" in building_costs:
 if "gather camp" in building_costs:
     del building_costs["gather camp"]
 
-selected_building = "home"
+class Simulation:
+    def __init__(self, ant_count=ANT_COUNT, width=WIDTH, height=HEIGHT, seed=None):
+        self.width = width
+        self.height = height
+        self.ant_count = ant_count
+        self.streams = RandomStreams(seed)
+        self.seed = self.streams.seed
+        self.resources = dict(STARTING_RESOURCES)
+        self.tick = 0
+
+        self.ants = EntityPool()
+        for _ in range(ant_count // 2):
+            self.ants.add(Ant(width//2, height//2, is_adult=True))
+        for _ in range(ant_count - len(self.ants)):
+            self.ants.add(Ant(width//2, height//2, is_adult=False))
+
+        self.areas = generate_areas(width, height, self.streams.world)
+        self.terrain = TerrainMap(width, height, self.areas)
+        self.food_sources, self.lumber_areas, self.water_areas = generate_sources(width, height, self.streams.world)
+        self.jobs = JobBoard(self.food_sources + self.lumber_areas + self.water_areas)
+
+        self.buildings = BuildingRegistry([Building(width//2, height//2, "base")], raster=NearestRaster(width, height))
+
+        base_building = self.buildings.first("base")
+        if base_building:
+            self.queen = Queen(base_building.x, base_building.y)
+        else:
+            self.queen = Queen(width//2, height//2)
+
+        self.slots = CapacityIndex()
+        self.stats = ColonyStats(self.buildings, self.ants, self.slots)
+        self.commutes = CommuteScheduler(self.ants, key=self.ants.position)
+        self.ant_grid = AntGrid(self.ants)
+        self._buildings_seen = 0
+        self._homeless = deque(ant.handle for ant in self.ants)
+        self._school_releases = 0
+        self._track_buildings()
+        self.auto_player = None
+        self.build_log = []
+
+    def can_afford(self, building_type):
+        cost = building_costs[building_type]
+        return all(self.resources.get(r, 0) >= cost[r] for r in cost)
+
+    def pay_cost(self, building_type):
+        cost = building_costs[building_type]
+        for r in cost:
+            self.resources[r] -= cost[r]
+
+    def can_place(self, x, y, building_type):
+        if building_type == "fishing hut":
+            return self.terrain.near_shore(x, y)
+        return True
+
+    def place_building(self, x, y, building_type, source="player"):
+        if not self.can_afford(building_type):
+            return None
+        building = Building(x, y, building_type)
+        self.buildings.append(building)
+        self.pay_cost(building_type)
+        if building_type == "base":
+            self.queen.x, self.queen.y = x, y
+        self.build_log.append((self.tick, building_type, x, y, source))
+        return building
+
+    def run_auto_player(self):
+        action = self.auto_player.update(self.stats, self.buildings, self.resources, self.areas, self.food_sources, self.lumber_areas, self.water_areas, building_costs, self.tick, self.terrain)
+        if action["action"] == "build":
+            x, y = action["position"]
+            if self.can_place(x, y, action["building_type"]):
+                self.place_building(x, y, action["building_type"], "ai")
+        return action
+
+    def update_ants(self):
+        ants = self.ants
+        stats = self.stats
+        commutes = self.commutes
+        if self._buildings_seen != len(self.buildings):
+            # A new camp can be nearer than the drop-off a carrier set out
+            # for, and a new home or school has places to hand out.
+            commutes.wake_all(self.tick, ants)
+            self._track_buildings()
+            self._house_homeless()
+        due = commutes.begin_tick(self.tick)
+        stats.hunger_total += commutes.drift.get("hunger", 0)
+        stats.stamina_total += commutes.drift.get("stamina", 0)
+        for ant in due:
+            was_adult, was_happy, hunger, stamina = ant.is_adult, ant.is_happy(), ant.hunger, ant.stamina
+            ant.update(self.buildings, self.slots, self.resources, self.jobs)
+            happy = ant.is_happy()
+            stats.update_ant(ant, was_adult, was_happy, happy, hunger, stamina)
+            if happy:
+                ant.unhappy_ticks = 0
+            else:
+                ant.unhappy_ticks += 1
+                if ant.unhappy_ticks > FPS * 20:
+                    ants.remove(ant.handle)
+                    commutes.reorder()
+                    stats.remove_ant(ant)
+                    self.jobs.forget(ant)
+                    self._vacate(ant)
+                    self.ant_grid.remove(ant)
+                    continue
+            plan = ant.plan_commute(self.buildings, self.slots)
+            if plan:
+                commutes.sleep(ant, self.tick + 1, *plan)
+                self.ant_grid.place_path(ant, *commutes.path(ant))
+            else:
+                commutes.keep(ant)
+        if self.slots.released["school"] != self._school_releases:
+            self._school_releases = self.slots.released["school"]
+            self._wake_school_waiters()
+        self.jobs.dispatch(self.buildings, self.resources)
+        # Dispatch moves ants too, so the awake ones are filed afterwards.
+        for ant in commutes.awake:
+            self.ant_grid.place(ant)
+
+    def sync_ants(self):
+        # Ants with current positions for drawing; sleepers are interpolated.
+        self.commutes.interpolate(self.tick)
+        return self.ants
+
+    def visible_ants(self, rect):
+        # Like sync_ants(), but only the ants inside `rect`, found through
+        # the ant grid; only sleepers among them are interpolated.
+        candidates = self.ant_grid.query(rect)
+        self.commutes.interpolate(self.tick, candidates)
+        return [ant for ant in candidates if rect.collidepoint(ant.x, ant.y)]
+
+    def settle_ants(self):
+        # Wakes every commuter so ant state is exact, e.g. for comparing
+        # against the vector engine.
+        self.commutes.wake_all(self.tick, self.ants)
+        return self.ants
+
+    def _track_buildings(self):
+        # Open the places of homes and schools placed since the last call.
+        for building in self.buildings[self._buildings_seen:]:
+            self.slots.track(building)
+        self._buildings_seen = len(self.buildings)
+
+    def _next_homeless(self):
+        # Longest-waiting ant still alive without a home, or None.
+        while self._homeless:
+            ant = self.ants.get(self._homeless.popleft())
+            if ant is not None:
+                return ant
+        return None
+
+    def _house(self, ant):
+        ant.home = self.slots.claim_nearest("home", ant.x, ant.y)
+        if ant.home is None:
+            self._homeless.append(ant.handle)
+
+    def _house_homeless(self):
+        while self.slots.free("home"):
+            ant = self._next_homeless()
+            if ant is None:
+                break
+            ant.home = self.slots.claim_nearest("home", ant.x, ant.y)
+
+    def _wake_school_waiters(self):
+        # A school place has opened: wake as many sleeping children as there
+        # are places, so they claim them next tick. Their sleep already
+        # counted towards this tick's totals, so they wake past it.
+        free = self.slots.free("school")
+        for ant in self.commutes.sleepers():
+            if not free:
+                break
+            if not ant.is_adult and ant.school_target is None:
+                self.commutes.wake(ant, self.tick + 1)
+                free -= 1
+
+    def _vacate(self, ant):
+        # A dying ant's home place passes straight to the next homeless ant.
+        ant.leave_school(self.slots)
+        if ant.home is not None:
+            heir = self._next_homeless()
+            if heir is not None:
+                heir.home = ant.home
+            else:
+                self.slots.release(ant.home)
+            ant.home = None
+
+    def index_slots(self):
+        # Rebuild occupancy from the buildings and every ant's places, e.g.
+        # after loading a snapshot.
+        self.slots = CapacityIndex()
+        self.stats.slots = self.slots
+        self._school_releases = 0
+        self._buildings_seen = 0
+        self._track_buildings()
+        self._homeless = deque()
+        for ant in self.ants:
+            if ant.school_target is not None:
+                self.slots.claim(ant.school_target)
+            if ant.home is not None:
+                self.slots.claim(ant.home)
+            else:
+                self._homeless.append(ant.handle)
+        self._house_homeless()
+
+    def add_child(self, x, y):
+        ant = Ant(x, y, is_adult=False)
+        self.ants.add(ant)
+        self._house(ant)
+        self.stats.add_ant(ant)
+        self.commutes.add(ant)
+        self.ant_grid.place(ant)
+
+    def update_queen(self):
+        queen = self.queen
+        queen.update(self.ants, self.resources)
+        if self.stats.all_happy() and queen.can_lay():
+            queen.lay_timer += 1
+            if queen.lay_timer > FPS * 10:
+                self.add_child(queen.x, queen.y)
+                queen.lay_timer = 0
+        else:
+            queen.lay_timer = 0
+
+    def update(self, profiler=NULL_PROFILER):
+        if self.auto_player is not None:
+            with profiler.phase("auto_player"):
+                self.run_auto_player()
+        with profiler.phase("ants"):
+            self.update_ants()
+        with profiler.phase("queen"):
+            self.update_queen()
+        self.tick += 1
 
-base_building = [b for b in buildings if b.type == "base"]
-if base_building:
-    queen = Queen(base_building[0].x, base_building[0].y)
-else:
-    queen = Queen(WIDTH//2, HEIGHT//2)
+    def step(self, n=1):
+        for _ in range(n):
+            self.update()
 
 BUILDING_LIST = [
     {"type": "home", "label": "Home", "desc": "House for 5 ants.", "icon": None},
@@ -396,193 +735,249 @@ for i, b in enumerate(BUILDING_LIST):
 
 BUILDING_DESCRIPTIONS = {b["type"]: b["desc"] for b in BUILDING_LIST}
 
-def draw_ui(selected_building, mouse_pos=None):
+HUD_RECT = pygame.Rect(0, 0, max(400, BUILDING_BTN_RECTS[-1].right + 10), 340)
+SPEED_KEYS = {pygame.K_1: 0, pygame.K_2: 1, pygame.K_3: 2, pygame.K_4: 3}
+BACKGROUND_COLOR = (200, 255, 200)
+QUICKSAVE_PATH = "quicksave.antsnap"
+PROFILER_POS = (WIDTH - OVERLAY_SIZE[0] - 10, HEIGHT - OVERLAY_SIZE[1] - 10)
+PAN_SPEED = 800
+ANT_CULL_MARGIN = 32
+
+def render_hud(surface, values):
+    food, wood, fish, ant_count, happy, queen_status, children, adults, housed, homeless, speed, selected_building, hovered = values
     y = 70
-    screen.blit(FOOD_ICON, (10, y))
-    txt = RESOURCE_FONT.render(f"{resources['food']}", True, BLACK)
-    screen.blit(txt, (38, y+2))
+    surface.blit(RESOURCE_ICONS["food"], (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"{food}", BLACK), (38, y+2))
     y += 28
-    screen.blit(WOOD_ICON, (10, y))
-    txt = RESOURCE_FONT.render(f"{resources['wood']}", True, BLACK)
-    screen.blit(txt, (38, y+2))
+    surface.blit(RESOURCE_ICONS["wood"], (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"{wood}", BLACK), (38, y+2))
     y += 28
-    if 'fish' in resources:
-        fish_txt = RESOURCE_FONT.render(f"Fish: {resources['fish']}", True, BLACK)
-        screen.blit(fish_txt, (10, y))
+    if fish is not None:
+        surface.blit(RESOURCE_TEXT.render(f"Fish: {fish}", BLACK), (10, y))
         y += 25
-    ant_txt = RESOURCE_FONT.render(f"Ants: {len(ants)}", True, BLACK)
-    screen.blit(ant_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Ants: {ant_count}", BLACK), (10, y))
     y += 25
-    happy_txt = RESOURCE_FONT.render(f"Happy: {sum(1 for a in ants if a.is_happy())} / {len(ants)}", True, (0, 150, 0))
-    screen.blit(happy_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Happy: {happy} / {ant_count}", (0, 150, 0)), (10, y))
     y += 25
-    queen_txt = RESOURCE_FONT.render(f"Queen: {queen.status}", True, (200, 0, 0) if queen.status == "hungry" else (0, 0, 0))
-    screen.blit(queen_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Queen: {queen_status}", (200, 0, 0) if queen_status == "hungry" else (0, 0, 0)), (10, y))
     y += 25
-    ca_txt = RESOURCE_FONT.render(f"Children: {sum(1 for a in ants if not a.is_adult)}  Adults: {sum(1 for a in ants if a.is_adult)}", True, (0, 0, 0))
-    screen.blit(ca_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Children: {children}  Adults: {adults}", (0, 0, 0)), (10, y))
     y += 25
-    homes = [b for b in buildings if b.type == "home"]
-    housed = min(len(ants), len(homes)*5)
-    homeless = max(0, len(ants) - len(homes)*5)
-    home_txt = RESOURCE_FONT.render(f"Housed: {housed} / {len(ants)}", True, BLACK)
-    screen.blit(home_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Housed: {housed} / {ant_count}", BLACK), (10, y))
     y += 25
-    homeless_txt = RESOURCE_FONT.render(f"Homeless: {homeless}", True, (200, 0, 0) if homeless else (0, 100, 0))
-    screen.blit(homeless_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Homeless: {homeless}", (200, 0, 0) if homeless else (0, 100, 0)), (10, y))
+    y += 25
+    surface.blit(RESOURCE_TEXT.render(f"Speed: {speed} (1-4)", BLACK), (10, y))
     y += 25
 
-    small_font = pygame.font.SysFont("Arial", 14)
     for i, b in enumerate(BUILDING_LIST):
         rect = BUILDING_BTN_RECTS[i]
         color = (180, 220, 255) if b["type"] == selected_building else (220, 220, 220)
-        pygame.draw.rect(screen, color, rect, border_radius=8)
-        pygame.draw.rect(screen, BLACK, rect, 2, border_radius=8)
+        pygame.draw.rect(surface, color, rect, border_radius=8)
+        pygame.draw.rect(surface, BLACK, rect, 2, border_radius=8)
         icon = BUILDING_ICONS.get(b["type"])
         if icon:
-            screen.blit(icon, (rect.x + 78, rect.y + 12))
-        label = RESOURCE_FONT.render(b["label"], True, BLACK)
-        screen.blit(label, (rect.x + 8, rect.y + 8))
+            surface.blit(icon, (rect.x + 78, rect.y + 12))
+        surface.blit(RESOURCE_TEXT.render(b["label"], BLACK), (rect.x + 8, rect.y + 8))
         cost = building_costs.get(b["type"], {})
         xcost = rect.x + 8
         if "food" in cost:
-            screen.blit(FOOD_ICON, (xcost, rect.y + 32))
-            cost_txt = small_font.render(str(cost["food"]), True, (80, 80, 80))
-            screen.blit(cost_txt, (xcost + 22, rect.y + 34))
+            surface.blit(RESOURCE_ICONS["food"], (xcost, rect.y + 32))
+            surface.blit(SMALL_TEXT.render(str(cost["food"]), (80, 80, 80)), (xcost + 22, rect.y + 34))
             xcost += 40
         if "wood" in cost:
-            screen.blit(WOOD_ICON, (xcost, rect.y + 32))
-            cost_txt = small_font.render(str(cost["wood"]), True, (80, 80, 80))
-            screen.blit(cost_txt, (xcost + 22, rect.y + 34))
+            surface.blit(RESOURCE_ICONS["wood"], (xcost, rect.y + 32))
+            surface.blit(SMALL_TEXT.render(str(cost["wood"]), (80, 80, 80)), (xcost + 22, rect.y + 34))
             xcost += 40
-        if mouse_pos and rect.collidepoint(mouse_pos):
-            pygame.draw.rect(screen, (100, 180, 255), rect, 3, border_radius=8)
-
-def can_afford(building_type):
-    cost = building_costs[building_type]
-    return all(resources.get(r, 0) >= cost[r] for r in cost)
-
-def pay_cost(building_type):
-    cost = building_costs[building_type]
-    for r in cost:
-        resources[r] -= cost[r]
-
-def point_near_polygon_edge(point, polygon, max_dist=20):
-    px, py = point
-    n = len(polygon)
-    for i in range(n):
-        x1, y1 = polygon[i]
-        x2, y2 = polygon[(i+1)%n]
-        dx, dy = x2-x1, y2-y1
-        if dx == dy == 0:
-            dist = ((px-x1)**2 + (py-y1)**2)**0.5
-        else:
-            t = max(0, min(1, ((px-x1)*dx + (py-y1)*dy)/(dx*dx+dy*dy)))
-            proj_x = x1 + t*dx
-            proj_y = y1 + t*dy
-            dist = ((px-proj_x)**2 + (py-proj_y)**2)**0.5
-        if dist <= max_dist:
-            return True
-    return False
-
-def point_in_polygon(point, polygon):
-    x, y = point
-    inside = False
-    n = len(polygon)
-    px1, py1 = polygon[0]
-    for i in range(n+1):
-        px2, py2 = polygon[i % n]
-        if y > min(py1, py2):
-            if y <= max(py1, py2):
-                if x <= max(px1, px2):
-                    if py1 != py2:
-                        xinters = (y-py1)*(px2-px1)/(py2-py1)+px1
-                    if px1 == px2 or x <= xinters:
-                        inside = not inside
-        px1, py1 = px2, py2
-    return inside
-
-repro_timer = 0
-while True:
-    screen.fill((200, 255, 200))
-    mouse_pos = pygame.mouse.get_pos()
-
-    for area in areas:
-        area.draw(screen)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            button_clicked = False
-            for i, rect in enumerate(BUILDING_BTN_RECTS):
-                if rect.collidepoint(event.pos):
-                    selected_building = BUILDING_LIST[i]["type"]
-                    button_clicked = True
-            if not button_clicked:
-                mx, my = pygame.mouse.get_pos()
-                if selected_building != "fishing hut":
-                    for area in areas:
-                        if area.type == "water" and point_in_polygon((mx, my), area.points):
-                            continue
-                if selected_building == "fishing hut":
-                    can_place = False
-                    for area in areas:
-                        if area.type == "water" and point_near_polygon_edge((mx, my), area.points, 20):
-                            can_place = True
-                            break
-                    if not can_place:
-                        continue
-                if can_afford(selected_building):
-                    buildings.append(Building(mx, my, selected_building))
-                    pay_cost(selected_building)
-                    if selected_building == "base":
-                        queen.x, queen.y = mx, my
-
-    happy_ants = 0
-    unhappy_ants = 0
-    children = 0
-    adults = 0
-    schools_state = {}
-    for ant in ants[:]:
-        ant.update(food_sources, lumber_areas, water_areas, buildings, schools_state)
-        ant.draw(screen)
-        if ant.is_happy():
-            ant.unhappy_ticks = 0
-            happy_ants += 1
-        else:
-            ant.unhappy_ticks += 1
-            unhappy_ants += 1
-            if ant.unhappy_ticks > FPS * 20:
-                ants.remove(ant)
-        if ant.is_adult:
-            adults += 1
-        else:
-            children += 1
-
-    queen.update(ants)
-    if happy_ants == len(ants) and len(ants) > 0 and queen.can_lay():
-        queen.lay_timer += 1
-        if queen.lay_timer > FPS * 10:
-            ants.append(Ant(queen.x, queen.y, is_adult=False))
-            queen.lay_timer = 0
+        if i == hovered:
+            pygame.draw.rect(surface, (100, 180, 255), rect, 3, border_radius=8)
+
+HUD_PANEL = HudPanel(HUD_RECT.size, render_hud)
+
+def draw_ui(screen, sim, selected_building, mouse_pos=None, speed="1x"):
+    resources = sim.resources
+    stats = sim.stats
+    hovered = None
+    if mouse_pos:
+        for i, rect in enumerate(BUILDING_BTN_RECTS):
+            if rect.collidepoint(mouse_pos):
+                hovered = i
+    values = (
+        resources["food"],
+        resources["wood"],
+        resources.get("fish"),
+        stats.population,
+        stats.happy,
+        sim.queen.status,
+        stats.children,
+        stats.adults,
+        stats.housed,
+        stats.homeless,
+        speed,
+        selected_building,
+        hovered,
+    )
+    return HUD_PANEL.draw(screen, HUD_RECT.topleft, values)
+
+def run_headless(ticks, ant_count=ANT_COUNT, seed=None):
+    sim = Simulation(ant_count, seed=seed)
+    start = time.perf_counter()
+    sim.step(ticks)
+    elapsed = time.perf_counter() - start
+    print(f"Seed {sim.seed}: simulated {sim.tick} ticks ({sim.tick / FPS:.0f}s of colony time) in {elapsed:.2f}s")
+    print(f"Ants: {len(sim.ants)}  Buildings: {len(sim.buildings)}  Resources: {sim.resources}")
+    return sim
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def main(dirty_rects=False, seed=None, record=None, load=None, autosave=None, save_path=QUICKSAVE_PATH, profile_out=None, world_size=(WIDTH, HEIGHT)):
+    from snapshot import BackgroundSaver, save_snapshot, load_snapshot
+
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Idle Ant Colony")
+    ASSETS.convert()
+    clock = pygame.time.Clock()
+
+    sim = load_snapshot(load, Simulation) if load else Simulation(width=world_size[0], height=world_size[1], seed=seed)
+    camera = Camera((WIDTH, HEIGHT), (sim.width, sim.height))
+    dragging = False
+    last_autosave = time.perf_counter()
+    saver = BackgroundSaver()
+    selected_building = "home"
+    background = StaticBackground((WIDTH, HEIGHT), BACKGROUND_COLOR)
+    presenter = DirtyRectPresenter() if dirty_rects else None
+    timestep = FixedTimestep(FPS)
+    frame_time = 1 / FPS
+    profiler = FrameProfiler(target_ms=1000 / FPS)
+    show_profiler = False
+
+    while True:
+        profiler.begin_frame()
+        with profiler.phase("events"):
+            mouse_pos = pygame.mouse.get_pos()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    saver.wait()
+                    if record:
+                        from replay import ReplayLog
+                        ReplayLog.from_simulation(sim).save(record)
+                        print(f"Saved replay of seed {sim.seed} to {record}")
+                    if profile_out:
+                        profiler.export(profile_out)
+                        print(f"Saved frame profile to {profile_out}")
+                    pygame.quit()
+                    sys.exit()
+
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    show_profiler = not show_profiler
+
+                elif event.type == pygame.KEYDOWN and event.key in SPEED_KEYS:
+                    timestep.set_speed(SPEED_MULTIPLIERS[SPEED_KEYS[event.key]])
+
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                    saver.wait()
+                    save_snapshot(sim, save_path)
+                    print(f"Saved snapshot at tick {sim.tick} to {save_path}")
+
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and os.path.exists(save_path):
+                    saver.wait()
+                    sim = load_snapshot(save_path, Simulation)
+                    camera = Camera((WIDTH, HEIGHT), (sim.width, sim.height))
+                    background.invalidate()
+
+                elif event.type == pygame.MOUSEWHEEL:
+                    camera.zoom_at(event.y, mouse_pos)
+
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+                    dragging = True
+
+                elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+                    dragging = False
+
+                elif event.type == pygame.MOUSEMOTION and dragging:
+                    camera.pan(-event.rel[0], -event.rel[1])
+
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    button_clicked = False
+                    for i, rect in enumerate(BUILDING_BTN_RECTS):
+                        if rect.collidepoint(event.pos):
+                            selected_building = BUILDING_LIST[i]["type"]
+                            button_clicked = True
+                    if not button_clicked:
+                        mx, my = camera.to_world(event.pos)
+                        if sim.can_place(mx, my, selected_building):
+                            sim.place_building(mx, my, selected_building)
+
+            keys = pygame.key.get_pressed()
+            pan_x = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+            pan_y = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+            if pan_x or pan_y:
+                camera.pan(pan_x * PAN_SPEED * frame_time, pan_y * PAN_SPEED * frame_time)
+
+        timestep.advance(frame_time, lambda: sim.update(profiler))
+
+        if autosave and time.perf_counter() - last_autosave >= autosave:
+            # Forked, so the save runs beside the frame loop; if the last
+            # one is still writing, try again next frame.
+            if saver.save(sim, save_path):
+                last_autosave = time.perf_counter()
+
+        # Sources and buildings live on the static background, so their
+        # drawing cost only shows up in the frames where it is rebuilt.
+        # Zoomed frames are drawn 1:1 into the camera's surface and scaled
+        # to the window in one pass.
+        view = camera.view_rect
+        target = screen if camera.zoom == 1 else camera.surface
+        with profiler.phase("sources_buildings"):
+            sources = sim.food_sources + sim.lumber_areas + sim.water_areas
+            full_redraw = background.update(sim.areas, sources, sim.buildings, view) or presenter is None or target is not screen
+        with profiler.phase("clear"):
+            if full_redraw:
+                target.blit(background.surface, (0, 0))
+            else:
+                presenter.erase(screen, background.surface)
+
+        with profiler.phase("ant_draw"):
+            ox, oy = view.topleft
+            visible = view.inflate(2 * ANT_CULL_MARGIN, 2 * ANT_CULL_MARGIN)
+            rects = [ant.draw(target, ox, oy) for ant in sim.visible_ants(visible)]
+            rects.append(sim.queen.draw(target, ox, oy))
+            if target is not screen:
+                pygame.transform.scale(target, (WIDTH, HEIGHT), screen)
+
+        with profiler.phase("hud"):
+            if not full_redraw:
+                screen.blit(background.surface, HUD_RECT, HUD_RECT)
+            draw_ui(screen, sim, selected_building, mouse_pos, timestep.label)
+            rects.append(HUD_RECT)
+            if show_profiler:
+                rects.append(profiler.draw(screen, PROFILER_POS, SMALL_FONT))
+
+        with profiler.phase("flip"):
+            if presenter is None:
+                pygame.display.flip()
+            else:
+                presenter.present(rects, full_redraw)
+        with profiler.phase("wait"):
+            frame_time = clock.tick(FPS) / 1000
+        profiler.end_frame()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Idle Ant Colony")
+    parser.add_argument("--headless", type=int, metavar="TICKS", help="run TICKS simulation ticks without a display and exit")
+    parser.add_argument("--ants", type=int, default=ANT_COUNT, help="starting ant count for headless runs")
+    parser.add_argument("--dirty-rects", action="store_true", help="only push changed screen regions to the display")
+    parser.add_argument("--seed", type=int, default=None, help="seed for world generation and AI")
+    parser.add_argument("--record", metavar="PATH", help="save a replay log of build actions on exit")
+    parser.add_argument("--load", metavar="PATH", help="resume from a snapshot saved with F5 or --autosave")
+    parser.add_argument("--autosave", type=float, metavar="SECONDS", help="write a snapshot every SECONDS of play")
+    parser.add_argument("--profile-out", metavar="PATH", help="write per-phase frame timings to PATH (.csv or .json) on exit")
+    parser.add_argument("--world", type=parse_size, default=(WIDTH, HEIGHT), metavar="WxH", help="world size; larger than the window enables scrolling")
+    args = parser.parse_args()
+    if args.headless is not None:
+        run_headless(args.headless, args.ants, args.seed)
     else:
-        queen.lay_timer = 0
-
-    for src in food_sources:
-        src.draw(screen)
-    for src in lumber_areas:
-        src.draw(screen)
-    for src in water_areas:
-        src.draw(screen)
-
-    for b in buildings:
-        b.draw(screen)
-
-    queen.draw(screen)
-
-    draw_ui(selected_building, mouse_pos)
-    pygame.display.flip()
-    clock.tick(FPS)
+        main(args.dirty_rects, args.seed, args.record, args.load, args.autosave, profile_out=args.profile_out, world_size=args.world)
@@ -1,9 +1,27 @@
+import argparse
 import pygame
 import random
 import sys
-import os
 import math
 from auto_player import AutoPlayer
+from ant_colony import Ant, ASSETS, BUILDING_IMAGES, RESOURCE_ICONS
+from building_registry import BuildingRegistry
+from nearest_raster import NearestRaster
+from render_layers import StaticBackground
+from hud import TextCache, HudPanel
+from colony_stats import ColonyStats
+from terrain import TerrainMap
+from job_board import JobBoard
+from entity_pool import EntityPool
+from capacity import CapacityIndex
+from seeding import RandomStreams
+
+parser = argparse.ArgumentParser(description="Idle Ant Colony, run by the AutoPlayer")
+parser.add_argument("--seed", type=int, default=None, help="seed for world generation and AI")
+args = parser.parse_args()
+streams = RandomStreams(args.seed)
+world_rng = streams.world
+print(f"Seed {streams.seed}")
 
 pygame.init()
 
@@ -11,6 +29,7 @@ WIDTH, HEIGHT = 1200, 900
 FPS = 60
 ANT_COUNT = 30
 RESOURCE_FONT = pygame.font.SysFont("Arial", 20)
+RESOURCE_TEXT = TextCache(RESOURCE_FONT)
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -26,180 +45,6 @@ PINK = (255, 180, 220)
 
 resources = {"food": 500, "wood": 500, "fish": 500}
 
-ANT_ADULT_IMG = pygame.image.load(os.path.join('assets', 'ant_adult.png'))
-ANT_CHILD_IMG = pygame.image.load(os.path.join('assets', 'ant_child.png'))
-ANT_ADULT_IMG = pygame.transform.scale(ANT_ADULT_IMG, (48, 48))
-ANT_CHILD_IMG = pygame.transform.scale(ANT_CHILD_IMG, (32, 32))
-
-BUILDING_ICONS = {
-    "hub": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'hub.png')), (24, 24)),
-    "lumber camp": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'lumber_camp.png')), (24, 24)),
-    "fishing hut": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'fishing_hut.png')), (24, 24)),
-    "school": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'school.png')), (24, 24)),
-    "bonfire": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'campfire.png')), (24, 24)),
-    "home": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'home.png')), (24, 24)),
-    "base": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'castle.png')), (24, 24)),
-}
-
-BUILDING_IMAGES = {
-    "hub": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'hub.png')), (48, 48)),
-    "lumber camp": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'lumber_camp.png')), (48, 48)),
-    "fishing hut": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'fishing_hut.png')), (48, 48)),
-    "school": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'school.png')), (48, 48)),
-    "bonfire": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'campfire.png')), (48, 48)),
-    "home": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'home.png')), (48, 48)),
-    "base": pygame.transform.scale(pygame.image.load(os.path.join('assets', 'castle.png')), (48, 48)),
-}
-
-FOOD_ICON = pygame.transform.scale(pygame.image.load(os.path.join('assets', 'food.png')), (24, 24))
-WOOD_ICON = pygame.transform.scale(pygame.image.load(os.path.join('assets', 'wood.png')), (24, 24))
-
-class Ant:
-    def __init__(self, x, y, is_adult=False):
-        self.x = x
-        self.y = y
-        self.speed = 1 if is_adult else 0.5
-        self.target = None
-        self.carrying = None
-        self.stamina = 100
-        self.resting = False
-        self.need_food = False
-        self.hunger = 0
-        self.eating = False
-        self.unhappy_ticks = 0
-        self.age = 0
-        self.is_adult = is_adult
-        self.experience = 0
-        self.at_school = False
-        self.school_target = None
-        self.last_dx = 0
-        self.last_dy = -1
-
-    def update(self, food_sources, lumber_areas, water_areas, buildings, schools_state):
-        self.age += 1 / FPS
-        if not self.is_adult and self.experience >= 200:
-            self.is_adult = True
-            self.speed = 1
-            self.at_school = False
-            self.school_target = None
-
-        if not self.is_adult:
-            if not self.at_school:
-                available_schools = [b for b in buildings if b.type == "school" and schools_state.get(id(b), 0) < 5]
-                if available_schools:
-                    closest = min(available_schools, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                    self.school_target = closest
-                    self.move_towards(closest.x, closest.y)
-                    if abs(self.x - closest.x) < 5 and abs(self.y - closest.y) < 5:
-                        self.at_school = True
-                        schools_state[id(closest)] = schools_state.get(id(closest), 0) + 1
-                        return
-                else:
-                    self.school_target = None
-            else:
-                self.experience += 0.1
-                return
-
-        self.hunger += 0.01
-        if self.hunger > 100:
-            self.hunger = 100
-
-        if self.hunger >= 70 or self.eating:
-            food_buildings = [b for b in buildings if b.type == "home"]
-            if resources["food"] > 0 or resources["fish"] > 0:
-                food_buildings += [b for b in buildings if b.type == "fishing hut"]
-            if food_buildings:
-                closest = min(food_buildings, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                self.move_towards(closest.x, closest.y)
-                if abs(self.x - closest.x) < 5 and abs(self.y - closest.y) < 5:
-                    if resources["food"] > 0:
-                        resources["food"] -= 1
-                        self.hunger = max(0, self.hunger - 15)
-                        self.eating = False
-                    elif resources["fish"] > 0:
-                        resources["fish"] -= 1
-                        self.hunger = max(0, self.hunger - 15)
-                        self.eating = False
-                    else:
-                        self.eating = True
-                else:
-                    self.eating = True
-                return
-            else:
-                self.eating = True
-                return
-        else:
-            self.eating = False
-
-        if self.stamina <= 20:
-            self.resting = True
-        if self.resting:
-            hub = next((b for b in buildings if b.type == "hub"), None)
-            if hub:
-                self.move_towards(hub.x, hub.y)
-                if abs(self.x - hub.x) < 5 and abs(self.y - hub.y) < 5:
-                    self.stamina = min(100, self.stamina + 3)
-                    if self.stamina >= 80:
-                        self.resting = False
-                    return
-            else:
-                self.stamina = min(100, self.stamina + 1)
-                return
-        else:
-            self.stamina -= 0.01
-
-        if self.carrying:
-            drop_x, drop_y = 600, 450
-            if self.carrying == "fish":
-                huts = [b for b in buildings if b.type == "fishing hut"]
-                if huts:
-                    closest = min(huts, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                    drop_x, drop_y = closest.x, closest.y
-            elif self.carrying == "wood":
-                camps = [b for b in buildings if b.type == "lumber camp"]
-                if camps:
-                    closest = min(camps, key=lambda b: (b.x - self.x) ** 2 + (b.y - self.y) ** 2)
-                    drop_x, drop_y = closest.x, closest.y
-            self.move_towards(drop_x, drop_y)
-            if abs(self.x - drop_x) < 5 and abs(self.y - drop_y) < 5:
-                resources[self.carrying] += 1
-                self.carrying = None
-        else:
-            if self.is_adult or not self.carrying:
-                if self.target is None or random.random() < 0.01:
-                    all_sources = food_sources + lumber_areas + water_areas
-                    self.target = random.choice(all_sources)
-                self.move_towards(self.target.x, self.target.y)
-                if abs(self.x - self.target.x) < 5 and abs(self.y - self.target.y) < 5:
-                    self.carrying = self.target.type
-
-    def move_towards(self, tx, ty):
-        dx, dy = tx - self.x, ty - self.y
-        dist = max(1, (dx**2 + dy**2)**0.5)
-        self.x += self.speed * dx / dist
-        self.y += self.speed * dy / dist
-        if abs(dx) > 1e-3 or abs(dy) > 1e-3:
-            self.last_dx = dx / dist
-            self.last_dy = dy / dist
-
-    def draw(self, screen):
-        angle = math.degrees(math.atan2(-self.last_dx, -self.last_dy))
-        if self.is_adult:
-            rotated_img = pygame.transform.rotate(ANT_ADULT_IMG, angle)
-            rect = rotated_img.get_rect(center=(int(self.x), int(self.y)))
-            screen.blit(rotated_img, rect.topleft)
-            pygame.draw.rect(screen, RED, (rect.centerx-16, rect.top-10, 32, 4))
-            pygame.draw.rect(screen, GREEN, (rect.centerx-16, rect.top-10, int(32*self.stamina/100), 4))
-        else:
-            rotated_img = pygame.transform.rotate(ANT_CHILD_IMG, angle)
-            rect = rotated_img.get_rect(center=(int(self.x), int(self.y)))
-            screen.blit(rotated_img, rect.topleft)
-            pygame.draw.rect(screen, RED, (rect.centerx-12, rect.top-8, 24, 3))
-            pygame.draw.rect(screen, GREEN, (rect.centerx-12, rect.top-8, int(24*self.stamina/100), 3))
-
-    def is_happy(self):
-        return self.hunger < 80 and self.stamina > 20
-
 class FoodSource:
     def __init__(self, x, y, type="food"):
         self.x = x
@@ -215,20 +60,20 @@ class FoodSource:
             pygame.draw.circle(screen, AQUA, (int(self.x), int(self.y)), 8)
 
 class Area:
-    def __init__(self, x, y, w, h, type):
+    def __init__(self, x, y, w, h, type, rng=random):
         self.x = x
         self.y = y
         self.w = w
         self.h = h
         self.type = type
         self.rect = pygame.Rect(x, y, w, h)
-        self.points = self.generate_blob(x, y, w, h)
+        self.points = self.generate_blob(x, y, w, h, rng=rng)
 
-    def generate_blob(self, x, y, w, h, n=10):
+    def generate_blob(self, x, y, w, h, n=10, rng=random):
         points = []
         for i in range(n):
             angle = (i / n) * 2 * math.pi
-            radius = random.uniform(0.7, 1.0)
+            radius = rng.uniform(0.7, 1.0)
             px = x + w/2 + radius * w/2 * math.cos(angle)
             py = y + h/2 + radius * h/2 * math.sin(angle)
             points.append((px, py))
@@ -263,9 +108,8 @@ class Queen:
         self.lay_timer = 0
         self.status = "ready"
 
-    def update(self, ants):
-        happy_ants = sum(1 for ant in ants if ant.is_happy())
-        if happy_ants == len(ants) and len(ants) > 0:
+    def update(self, stats):
+        if stats.all_happy():
             self.status = "ready"
         else:
             self.status = "hungry"
@@ -279,13 +123,14 @@ class Queen:
 
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Ant Colony - Auto Player")
+ASSETS.convert()
 clock = pygame.time.Clock()
 
-ants = []
+ants = EntityPool()
 for _ in range(ANT_COUNT // 2):
-    ants.append(Ant(WIDTH//2, HEIGHT//2, is_adult=True))
+    ants.add(Ant(WIDTH//2, HEIGHT//2, is_adult=True))
 for _ in range(ANT_COUNT - len(ants)):
-    ants.append(Ant(WIDTH//2, HEIGHT//2, is_adult=False))
+    ants.add(Ant(WIDTH//2, HEIGHT//2, is_adult=False))
 
 areas = []
 base_x, base_y = WIDTH//2, HEIGHT//2
@@ -297,52 +142,56 @@ def overlaps_any(rect, area_list):
             return True
     return False
 
-for _ in range(random.randint(4, 8)):
+for _ in range(world_rng.randint(4, 8)):
     for _ in range(30):
-        wx = random.randint(0, WIDTH-200)
-        wy = random.randint(0, HEIGHT-200)
-        ww = random.randint(100, 250)
-        wh = random.randint(80, 180)
-        temp_area = Area(wx, wy, ww, wh, "water")
+        wx = world_rng.randint(0, WIDTH-200)
+        wy = world_rng.randint(0, HEIGHT-200)
+        ww = world_rng.randint(100, 250)
+        wh = world_rng.randint(80, 180)
+        temp_area = Area(wx, wy, ww, wh, "water", rng=world_rng)
         if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
             areas.append(temp_area)
             break
-for _ in range(random.randint(3, 6)):
+for _ in range(world_rng.randint(3, 6)):
     for _ in range(30):
-        mx = random.randint(0, WIDTH-180)
-        my = random.randint(0, HEIGHT-180)
-        mw = random.randint(80, 180)
-        mh = random.randint(80, 180)
-        temp_area = Area(mx, my, mw, mh, "mountain")
+        mx = world_rng.randint(0, WIDTH-180)
+        my = world_rng.randint(0, HEIGHT-180)
+        mw = world_rng.randint(80, 180)
+        mh = world_rng.randint(80, 180)
+        temp_area = Area(mx, my, mw, mh, "mountain", rng=world_rng)
         if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
             areas.append(temp_area)
             break
-for _ in range(random.randint(2, 4)):
+for _ in range(world_rng.randint(2, 4)):
     for _ in range(30):
-        sx = random.randint(0, WIDTH-150)
-        sy = random.randint(0, HEIGHT-150)
-        sw = random.randint(80, 150)
-        sh = random.randint(60, 120)
-        temp_area = Area(sx, sy, sw, sh, "sand")
+        sx = world_rng.randint(0, WIDTH-150)
+        sy = world_rng.randint(0, HEIGHT-150)
+        sw = world_rng.randint(80, 150)
+        sh = world_rng.randint(60, 120)
+        temp_area = Area(sx, sy, sw, sh, "sand", rng=world_rng)
         if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
             areas.append(temp_area)
             break
-for _ in range(random.randint(2, 4)):
+for _ in range(world_rng.randint(2, 4)):
     for _ in range(30):
-        fx = random.randint(0, WIDTH-120)
-        fy = random.randint(0, HEIGHT-120)
-        fw = random.randint(60, 120)
-        fh = random.randint(60, 120)
-        temp_area = Area(fx, fy, fw, fh, "flowers")
+        fx = world_rng.randint(0, WIDTH-120)
+        fy = world_rng.randint(0, HEIGHT-120)
+        fw = world_rng.randint(60, 120)
+        fh = world_rng.randint(60, 120)
+        temp_area = Area(fx, fy, fw, fh, "flowers", rng=world_rng)
         if not temp_area.rect.colliderect(base_rect) and not overlaps_any(temp_area.rect, areas):
             areas.append(temp_area)
             break
 
-food_sources = [FoodSource(random.randint(50, WIDTH-50), random.randint(50, HEIGHT-50), random.choice(["food"])) for _ in range(25)]
-lumber_areas = [FoodSource(random.randint(100, WIDTH-100), random.randint(100, HEIGHT-100), "wood") for _ in range(15)]
-water_areas = [FoodSource(random.randint(100, WIDTH-100), random.randint(100, HEIGHT-100), "fish") for _ in range(15)]
+food_sources = [FoodSource(world_rng.randint(50, WIDTH-50), world_rng.randint(50, HEIGHT-50), world_rng.choice(["food"])) for _ in range(25)]
+lumber_areas = [FoodSource(world_rng.randint(100, WIDTH-100), world_rng.randint(100, HEIGHT-100), "wood") for _ in range(15)]
+water_areas = [FoodSource(world_rng.randint(100, WIDTH-100), world_rng.randint(100, HEIGHT-100), "fish") for _ in range(15)]
+terrain = TerrainMap(WIDTH, HEIGHT, areas)
+jobs = JobBoard(food_sources + lumber_areas + water_areas)
 
-buildings = [Building(WIDTH//2, HEIGHT//2, "base")]
+buildings = BuildingRegistry([Building(WIDTH//2, HEIGHT//2, "base")], raster=NearestRaster(WIDTH, HEIGHT))
+slots = CapacityIndex()
+stats = ColonyStats(buildings, ants)
 
 building_costs = {
     "base": {"food": 0, "wood": 0},
@@ -363,92 +212,65 @@ def pay_cost(building_type):
     for r in cost:
         resources[r] -= cost[r]
 
-def point_near_polygon_edge(point, polygon, max_dist=20):
-    px, py = point
-    n = len(polygon)
-    for i in range(n):
-        x1, y1 = polygon[i]
-        x2, y2 = polygon[(i+1)%n]
-        dx, dy = x2-x1, y2-y1
-        if dx == dy == 0:
-            dist = ((px-x1)**2 + (py-y1)**2)**0.5
-        else:
-            t = max(0, min(1, ((px-x1)*dx + (py-y1)*dy)/(dx*dx+dy*dy)))
-            proj_x = x1 + t*dx
-            proj_y = y1 + t*dy
-            dist = ((px-proj_x)**2 + (py-proj_y)**2)**0.5
-        if dist <= max_dist:
-            return True
-    return False
-
-def point_in_polygon(point, polygon):
-    x, y = point
-    inside = False
-    n = len(polygon)
-    px1, py1 = polygon[0]
-    for i in range(n+1):
-        px2, py2 = polygon[i % n]
-        if y > min(py1, py2):
-            if y <= max(py1, py2):
-                if x <= max(px1, px2):
-                    if py1 != py2:
-                        xinters = (y-py1)*(px2-px1)/(py2-py1)+px1
-                    if px1 == px2 or x <= xinters:
-                        inside = not inside
-        px1, py1 = px2, py2
-    return inside
-
-def draw_ui(auto_player_action=None):
+def render_hud(surface, values):
+    food, wood, fish, ant_count, happy, queen_status, children, adults, housed, homeless, ai_building, ai_reason, avg_hunger, avg_stamina = values
     y = 70
-    screen.blit(FOOD_ICON, (10, y))
-    txt = RESOURCE_FONT.render(f"{resources['food']}", True, BLACK)
-    screen.blit(txt, (38, y+2))
+    surface.blit(RESOURCE_ICONS["food"], (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"{food}", BLACK), (38, y+2))
     y += 28
-    screen.blit(WOOD_ICON, (10, y))
-    txt = RESOURCE_FONT.render(f"{resources['wood']}", True, BLACK)
-    screen.blit(txt, (38, y+2))
+    surface.blit(RESOURCE_ICONS["wood"], (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"{wood}", BLACK), (38, y+2))
     y += 28
-    if 'fish' in resources:
-        fish_txt = RESOURCE_FONT.render(f"Fish: {resources['fish']}", True, BLACK)
-        screen.blit(fish_txt, (10, y))
+    if fish is not None:
+        surface.blit(RESOURCE_TEXT.render(f"Fish: {fish}", BLACK), (10, y))
         y += 25
-    ant_txt = RESOURCE_FONT.render(f"Ants: {len(ants)}", True, BLACK)
-    screen.blit(ant_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Ants: {ant_count}", BLACK), (10, y))
     y += 25
-    happy_txt = RESOURCE_FONT.render(f"Happy: {sum(1 for a in ants if a.is_happy())} / {len(ants)}", True, (0, 150, 0))
-    screen.blit(happy_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Happy: {happy} / {ant_count}", (0, 150, 0)), (10, y))
     y += 25
-    queen_txt = RESOURCE_FONT.render(f"Queen: {queen.status}", True, (200, 0, 0) if queen.status == "hungry" else (0, 0, 0))
-    screen.blit(queen_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Queen: {queen_status}", (200, 0, 0) if queen_status == "hungry" else (0, 0, 0)), (10, y))
     y += 25
-    ca_txt = RESOURCE_FONT.render(f"Children: {sum(1 for a in ants if not a.is_adult)}  Adults: {sum(1 for a in ants if a.is_adult)}", True, (0, 0, 0))
-    screen.blit(ca_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Children: {children}  Adults: {adults}", (0, 0, 0)), (10, y))
     y += 25
-    homes = [b for b in buildings if b.type == "home"]
-    housed = min(len(ants), len(homes)*5)
-    homeless = max(0, len(ants) - len(homes)*5)
-    home_txt = RESOURCE_FONT.render(f"Housed: {housed} / {len(ants)}", True, BLACK)
-    screen.blit(home_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Housed: {housed} / {ant_count}", BLACK), (10, y))
     y += 25
-    homeless_txt = RESOURCE_FONT.render(f"Homeless: {homeless}", True, (200, 0, 0) if homeless else (0, 100, 0))
-    screen.blit(homeless_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Homeless: {homeless}", (200, 0, 0) if homeless else (0, 100, 0)), (10, y))
     y += 25
-    
-    if auto_player_action and auto_player_action["action"] == "build":
-        action_txt = RESOURCE_FONT.render(f"AI: Building {auto_player_action['building_type']}", True, (0, 0, 200))
-        screen.blit(action_txt, (10, y))
+
+    if ai_building is not None:
+        surface.blit(RESOURCE_TEXT.render(f"AI: Building {ai_building}", (0, 0, 200)), (10, y))
         y += 25
-        reason_txt = RESOURCE_FONT.render(f"Reason: {auto_player_action['reason']}", True, (100, 100, 100))
-        screen.blit(reason_txt, (10, y))
-    
+        surface.blit(RESOURCE_TEXT.render(f"Reason: {ai_reason}", (100, 100, 100)), (10, y))
+
     y += 25
-    debug_txt = RESOURCE_FONT.render(f"Food: {resources.get('food', 0)} + Fish: {resources.get('fish', 0)} = {resources.get('food', 0) + resources.get('fish', 0)}", True, (100, 100, 100))
-    screen.blit(debug_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Food: {food or 0} + Fish: {fish or 0} = {(food or 0) + (fish or 0)}", (100, 100, 100)), (10, y))
     y += 25
-    avg_hunger = sum(ant.hunger for ant in ants) / max(1, len(ants))
-    avg_stamina = sum(ant.stamina for ant in ants) / max(1, len(ants))
-    debug2_txt = RESOURCE_FONT.render(f"Avg Hunger: {avg_hunger:.1f}, Avg Stamina: {avg_stamina:.1f}", True, (100, 100, 100))
-    screen.blit(debug2_txt, (10, y))
+    surface.blit(RESOURCE_TEXT.render(f"Avg Hunger: {avg_hunger}, Avg Stamina: {avg_stamina}", (100, 100, 100)), (10, y))
+
+HUD_PANEL = HudPanel((WIDTH, 450), render_hud)
+
+def draw_ui(auto_player_action=None):
+    ai_building = ai_reason = None
+    if auto_player_action and auto_player_action["action"] == "build":
+        ai_building = auto_player_action["building_type"]
+        ai_reason = auto_player_action["reason"]
+    values = (
+        resources.get("food"),
+        resources.get("wood"),
+        resources.get("fish"),
+        stats.population,
+        stats.happy,
+        queen.status,
+        stats.children,
+        stats.adults,
+        stats.housed,
+        stats.homeless,
+        ai_building,
+        ai_reason,
+        f"{stats.avg_hunger:.1f}",
+        f"{stats.avg_stamina:.1f}",
+    )
+    return HUD_PANEL.draw(screen, (0, 0), values)
 
 base_building = [b for b in buildings if b.type == "base"]
 if base_building:
@@ -456,8 +278,9 @@ if base_building:
 else:
     queen = Queen(WIDTH//2, HEIGHT//2)
 
-auto_player = AutoPlayer()
+auto_player = AutoPlayer(streams.ai, WIDTH, HEIGHT)
 frame_count = 0
+background = StaticBackground((WIDTH, HEIGHT), (200, 255, 200))
 
 print("Auto Player initialized!")
 print("Starting automatic ant colony management...")
@@ -470,76 +293,61 @@ print("- Add bonfires for morale when needed")
 
 while True:
     frame_count += 1
-    screen.fill((200, 255, 200))
-
-    for area in areas:
-        area.draw(screen)
+    background.update(areas, food_sources + lumber_areas + water_areas, buildings)
+    screen.blit(background.surface, (0, 0))
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             pygame.quit()
             sys.exit()
 
-    auto_action = auto_player.update(ants, buildings, resources, areas, food_sources, lumber_areas, water_areas, building_costs, frame_count)
+    auto_action = auto_player.update(stats, buildings, resources, areas, food_sources, lumber_areas, water_areas, building_costs, frame_count, terrain)
     
     if auto_action["action"] == "build":
         building_type = auto_action["building_type"]
         position = auto_action["position"]
         
         if can_afford(building_type):
-            if building_type == "fishing hut":
-                can_place = False
-                for area in areas:
-                    if area.type == "water" and point_near_polygon_edge(position, area.points, 20):
-                        can_place = True
-                        break
-                if not can_place:
-                    continue
+            if building_type == "fishing hut" and not terrain.near_shore(*position):
+                continue
             
-            buildings.append(Building(position[0], position[1], building_type))
+            building = Building(position[0], position[1], building_type)
+            buildings.append(building)
+            slots.track(building)
             pay_cost(building_type)
             print(f"AI built {building_type} at {position}")
 
-    happy_ants = 0
-    unhappy_ants = 0
-    children = 0
-    adults = 0
-    schools_state = {}
-    for ant in ants[:]:
-        ant.update(food_sources, lumber_areas, water_areas, buildings, schools_state)
+    starved = []
+    for ant in ants:
+        was_adult, was_happy, hunger, stamina = ant.is_adult, ant.is_happy(), ant.hunger, ant.stamina
+        ant.update(buildings, slots, resources, jobs)
         ant.draw(screen)
-        if ant.is_happy():
+        happy = ant.is_happy()
+        stats.update_ant(ant, was_adult, was_happy, happy, hunger, stamina)
+        if happy:
             ant.unhappy_ticks = 0
-            happy_ants += 1
         else:
             ant.unhappy_ticks += 1
-            unhappy_ants += 1
             if ant.unhappy_ticks > FPS * 20:
-                ants.remove(ant)
-        if ant.is_adult:
-            adults += 1
-        else:
-            children += 1
-
-    queen.update(ants)
-    if happy_ants == len(ants) and len(ants) > 0 and queen.can_lay():
+                starved.append(ant)
+    for ant in starved:
+        ants.remove(ant.handle)
+        stats.remove_ant(ant)
+        jobs.forget(ant)
+        ant.leave_school(slots)
+    jobs.dispatch(buildings, resources)
+
+    queen.update(stats)
+    if stats.all_happy() and queen.can_lay():
         queen.lay_timer += 1
         if queen.lay_timer > FPS * 10:
-            ants.append(Ant(queen.x, queen.y, is_adult=False))
+            ant = Ant(queen.x, queen.y, is_adult=False)
+            ants.add(ant)
+            stats.add_ant(ant)
             queen.lay_timer = 0
     else:
         queen.lay_timer = 0
 
-    for src in food_sources:
-        src.draw(screen)
-    for src in lumber_areas:
-        src.draw(screen)
-    for src in water_areas:
-        src.draw(screen)
-
-    for b in buildings:
-        b.draw(screen)
-
     queen.draw(screen)
 
     draw_ui(auto_action)
@@ -0,0 +1,72 @@
+import math
+
+
+class AntGrid:
+    # Coarse buckets of ants for viewport queries. An awake ant sits in the
+    # cell under it; a commuting ant sits in every cell its straight path
+    # crosses, so it needs no re-bucketing until it wakes. Either way the
+    # cells an ant is filed under always contain where it is now.
+    def __init__(self, ants=(), cell_size=128):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._where = {}
+        for ant in ants:
+            self.place(ant)
+
+    def __len__(self):
+        return len(self._where)
+
+    def _file(self, ant, cells):
+        old = self._where.get(ant)
+        if old == cells:
+            return
+        if old is not None:
+            for cell in old:
+                del self._cells[cell][ant]
+        for cell in cells:
+            self._cells.setdefault(cell, {})[ant] = None
+        self._where[ant] = cells
+
+    def place(self, ant):
+        self._file(ant, ((int(ant.x // self.cell_size), int(ant.y // self.cell_size)),))
+
+    def place_path(self, ant, x0, y0, x1, y1):
+        # Cells crossed by the segment, walked one boundary at a time.
+        size = self.cell_size
+        cx, cy = int(x0 // size), int(y0 // size)
+        end = (int(x1 // size), int(y1 // size))
+        cells = [(cx, cy)]
+        dx, dy = x1 - x0, y1 - y0
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        next_x = ((cx + (dx > 0)) * size - x0) / dx if dx else math.inf
+        next_y = ((cy + (dy > 0)) * size - y0) / dy if dy else math.inf
+        delta_x = size / abs(dx) if dx else math.inf
+        delta_y = size / abs(dy) if dy else math.inf
+        while (cx, cy) != end and min(next_x, next_y) <= 1:
+            if next_x < next_y:
+                cx += step_x
+                next_x += delta_x
+            else:
+                cy += step_y
+                next_y += delta_y
+            cells.append((cx, cy))
+        if cells[-1] != end:
+            cells.append(end)
+        self._file(ant, tuple(cells))
+
+    def remove(self, ant):
+        for cell in self._where.pop(ant, ()):
+            del self._cells[cell][ant]
+
+    def query(self, rect):
+        # Ants filed in the cells overlapping `rect`; callers still test
+        # the exact position.
+        size = self.cell_size
+        found = {}
+        for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+                bucket = self._cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
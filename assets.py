@@ -0,0 +1,127 @@
+import json
+import os
+
+import pygame
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+ATLAS_CACHE = os.path.join(ASSET_DIR, ".cache", "atlas")
+ATLAS_WIDTH = 512
+ATLAS_PADDING = 1
+
+
+class AssetManager:
+    # `manifest` maps group name -> {key: (filename, (width, height))}. The
+    # group dicts are updated in place by convert(), so module-level aliases
+    # such as BUILDING_IMAGES pick up the converted surfaces.
+    def __init__(self, manifest, directory=ASSET_DIR, atlas=True, cache_path=ATLAS_CACHE):
+        self.manifest = manifest
+        self.directory = directory
+        self.atlas = None
+        self.rects = {}
+        self._groups = {name: {} for name in manifest}
+        if atlas:
+            if cache_path is None or not self._load_cache(cache_path):
+                self._build_atlas()
+                if cache_path is not None:
+                    self._save_cache(cache_path)
+            self._cut_atlas()
+        else:
+            for group, key, surface in self._scaled():
+                self._groups[group][key] = surface
+
+    def __getitem__(self, name):
+        return self._groups[name]
+
+    def convert(self):
+        # Needs a display mode; until then every blit converts pixel formats.
+        if self.atlas is not None:
+            self.atlas = self.atlas.convert_alpha()
+            self._cut_atlas()
+            return
+        for surfaces in self._groups.values():
+            for key, surface in surfaces.items():
+                surfaces[key] = surface.convert_alpha()
+
+    def _entries(self):
+        for group, items in self.manifest.items():
+            for key, (filename, size) in items.items():
+                yield group, key, filename, tuple(size)
+
+    def _scaled(self):
+        # Each file is decoded once, however many sizes and groups use it.
+        decoded = {}
+        scaled = {}
+        for group, key, filename, size in self._entries():
+            if filename not in decoded:
+                decoded[filename] = pygame.image.load(os.path.join(self.directory, filename))
+            if (filename, size) not in scaled:
+                scaled[filename, size] = pygame.transform.scale(decoded[filename], size)
+            yield group, key, scaled[filename, size]
+
+    def _build_atlas(self):
+        images = {}
+        for group, key, surface in self._scaled():
+            images.setdefault(id(surface), (surface, []))[1].append((group, key))
+
+        # Shelf packing, tallest first.
+        placed = []
+        x = y = shelf_height = 0
+        for surface, keys in sorted(images.values(), key=lambda item: -item[0].get_height()):
+            w, h = surface.get_size()
+            if x + w > ATLAS_WIDTH:
+                x = 0
+                y += shelf_height + ATLAS_PADDING
+                shelf_height = 0
+            placed.append((surface, keys, pygame.Rect(x, y, w, h)))
+            x += w + ATLAS_PADDING
+            shelf_height = max(shelf_height, h)
+
+        self.atlas = pygame.Surface((ATLAS_WIDTH, max(1, y + shelf_height)), pygame.SRCALPHA)
+        self.rects = {}
+        for surface, keys, rect in placed:
+            # Copy pixels verbatim rather than alpha-blending them onto the
+            # empty atlas, which would darken translucent edges.
+            flags = pygame.BLEND_RGBA_MAX if surface.get_flags() & pygame.SRCALPHA else 0
+            self.atlas.blit(surface, rect, special_flags=flags)
+            for group, key in keys:
+                self.rects[group, key] = rect
+
+    def _cut_atlas(self):
+        for (group, key), rect in self.rects.items():
+            self._groups[group][key] = self.atlas.subsurface(rect)
+
+    def _fingerprint(self):
+        files = sorted({filename for _, _, filename, _ in self._entries()})
+        stamps = {}
+        for filename in files:
+            st = os.stat(os.path.join(self.directory, filename))
+            stamps[filename] = [st.st_size, st.st_mtime_ns]
+        return {"manifest": {g: {k: [f, list(s)] for k, (f, s) in items.items()} for g, items in self.manifest.items()}, "files": stamps}
+
+    def _load_cache(self, cache_path):
+        try:
+            with open(cache_path + ".json") as f:
+                index = json.load(f)
+            if index["fingerprint"] != self._fingerprint():
+                return False
+            atlas = pygame.image.load(cache_path + ".png")
+        except (OSError, ValueError, KeyError, pygame.error):
+            return False
+        self.atlas = atlas
+        self.rects = {(group, key): pygame.Rect(rect) for group, key, rect in index["rects"]}
+        return True
+
+    def _save_cache(self, cache_path):
+        index = {
+            "fingerprint": self._fingerprint(),
+            "rects": [[group, key, list(rect)] for (group, key), rect in self.rects.items()],
+        }
+        # The cache only speeds up the next start; a read-only install
+        # simply keeps rebuilding the atlas in memory.
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            pygame.image.save(self.atlas, cache_path + ".png")
+            with open(cache_path + ".json", "w") as f:
+                json.dump(index, f)
+        except (OSError, pygame.error):
+            pass
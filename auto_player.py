@@ -3,12 +3,19 @@ import random
 import math
 from typing import List, Tuple, Dict, Any
 
+import numpy as np
+
 class AutoPlayer:
-    def __init__(self):
+    def __init__(self, rng=None, width=1200, height=900):
+        self.rng = rng or random
+        self.width = width
+        self.height = height
         self.last_building_time = 0
         self.building_cooldown = 60
         self.last_analysis_time = 0
-        self.analysis_cooldown = 120
+        self._stats = None
+        self._shortages = None
+        self._analysis = None
         
         self.building_priorities = {
             "home": 100,
@@ -33,25 +40,18 @@ class AutoPlayer:
             "bonfire": "base",
         }
     
-    def analyze_colony_needs(self, ants, buildings, resources, areas, food_sources, lumber_areas, water_areas):
+    def analyze_colony_needs(self, stats, buildings, resources, areas, food_sources, lumber_areas, water_areas):
         analysis = {
-            "total_ants": len(ants),
-            "adult_ants": sum(1 for ant in ants if ant.is_adult),
-            "children": sum(1 for ant in ants if not ant.is_adult),
-            "happy_ants": sum(1 for ant in ants if ant.is_happy()),
-            "homeless_ants": 0,
-            "building_counts": {},
+            "total_ants": stats.population,
+            "adult_ants": stats.adults,
+            "children": stats.children,
+            "happy_ants": stats.happy,
+            "homeless_ants": stats.homeless,
+            "building_counts": stats.building_counts(),
             "resource_shortages": [],
             "recommended_buildings": []
         }
         
-        for building in buildings:
-            analysis["building_counts"][building.type] = analysis["building_counts"].get(building.type, 0) + 1
-        
-        homes = analysis["building_counts"].get("home", 0)
-        housing_capacity = homes * 5
-        analysis["homeless_ants"] = max(0, len(ants) - housing_capacity)
-        
         if resources["food"] < self.resource_thresholds["food"]:
             analysis["resource_shortages"].append("food")
         if resources["wood"] < self.resource_thresholds["wood"]:
@@ -61,43 +61,43 @@ class AutoPlayer:
         
         if analysis["homeless_ants"] > 0:
             homes_needed = (analysis["homeless_ants"] + 4) // 5
-            recommendations.append(("home", homes_needed, 100))
+            recommendations.append(("home", homes_needed, self.building_priorities["home"]))
         
         hubs = analysis["building_counts"].get("hub", 0)
-        if hubs == 0 or len(ants) > hubs * 8:
-            recommendations.append(("hub", 1, 80))
+        if hubs == 0 or stats.population > hubs * 8:
+            recommendations.append(("hub", 1, self.building_priorities["hub"]))
         
         if "wood" in analysis["resource_shortages"]:
             lumber_camps = analysis["building_counts"].get("lumber camp", 0)
             if lumber_camps < 3:
-                recommendations.append(("lumber camp", 1, 60))
+                recommendations.append(("lumber camp", 1, self.building_priorities["lumber camp"]))
         
         if "food" in analysis["resource_shortages"]:
             fishing_huts = analysis["building_counts"].get("fishing hut", 0)
             if fishing_huts < 3:
-                recommendations.append(("fishing hut", 1, 50))
+                recommendations.append(("fishing hut", 1, self.building_priorities["fishing hut"]))
         
         if analysis["children"] > 0:
             schools = analysis["building_counts"].get("school", 0)
             children_per_school = 5
             schools_needed = (analysis["children"] + children_per_school - 1) // children_per_school
             if schools < schools_needed:
-                recommendations.append(("school", 1, 30))
+                recommendations.append(("school", 1, self.building_priorities["school"]))
         
-        unhappy_ratio = 1 - (analysis["happy_ants"] / max(1, len(ants)))
+        unhappy_ratio = 1 - (analysis["happy_ants"] / max(1, stats.population))
         if unhappy_ratio > 0.3:
             bonfires = analysis["building_counts"].get("bonfire", 0)
             if bonfires < 2:
-                recommendations.append(("bonfire", 1, 20))
+                recommendations.append(("bonfire", 1, self.building_priorities["bonfire"]))
         
         recommendations.sort(key=lambda x: x[2], reverse=True)
         analysis["recommended_buildings"] = recommendations
         
         return analysis
     
-    def find_optimal_placement(self, building_type, areas, buildings, food_sources, lumber_areas, water_areas):
-        WIDTH, HEIGHT = 1200, 900
-        base_x, base_y = WIDTH // 2, HEIGHT // 2
+    def find_optimal_placement(self, building_type, areas, buildings, food_sources, lumber_areas, water_areas, terrain):
+        base = buildings.first("base")
+        base_x, base_y = (base.x, base.y) if base else (self.width // 2, self.height // 2)
         
         if building_type == "lumber camp":
             best_pos = self._find_near_resource(lumber_areas, areas, "mountain", buildings)
@@ -105,7 +105,7 @@ class AutoPlayer:
                 return best_pos
         
         elif building_type == "fishing hut":
-            best_pos = self._find_near_water(areas, buildings)
+            best_pos = self._find_near_water(terrain, buildings)
             if best_pos:
                 return best_pos
         
@@ -114,84 +114,76 @@ class AutoPlayer:
             if best_pos:
                 return best_pos
         
-        return self._find_random_position(buildings, WIDTH, HEIGHT)
+        return self._find_random_position(buildings, self.width, self.height)
     
     def _find_near_resource(self, resource_sources, areas, area_type, buildings):
         if resource_sources:
-            source = random.choice(resource_sources)
+            source = self.rng.choice(resource_sources)
+            candidates = []
             for _ in range(20):
-                angle = random.uniform(0, 2 * math.pi)
-                distance = random.uniform(30, 80)
-                x = source.x + distance * math.cos(angle)
-                y = source.y + distance * math.sin(angle)
-                
-                if 50 < x < 1150 and 50 < y < 850:
-                    if not self._too_close_to_buildings(x, y, buildings):
-                        return (int(x), int(y))
+                angle = self.rng.uniform(0, 2 * math.pi)
+                distance = self.rng.uniform(30, 80)
+                candidates.append((source.x + distance * math.cos(angle),
+                                   source.y + distance * math.sin(angle)))
+            position = self._first_clear(candidates, buildings)
+            if position:
+                return position
         
         target_areas = [area for area in areas if area.type == area_type]
         if target_areas:
-            area = random.choice(target_areas)
+            area = self.rng.choice(target_areas)
+            candidates = []
             for _ in range(20):
-                edge_x = area.x + random.choice([0, area.w])
-                edge_y = area.y + random.choice([0, area.h])
-                
-                x = edge_x + random.uniform(-50, 50)
-                y = edge_y + random.uniform(-50, 50)
-                
-                if 50 < x < 1150 and 50 < y < 850:
-                    if not self._too_close_to_buildings(x, y, buildings):
-                        return (int(x), int(y))
+                edge_x = area.x + self.rng.choice([0, area.w])
+                edge_y = area.y + self.rng.choice([0, area.h])
+                candidates.append((edge_x + self.rng.uniform(-50, 50),
+                                   edge_y + self.rng.uniform(-50, 50)))
+            position = self._first_clear(candidates, buildings)
+            if position:
+                return position
         
         return None
     
-    def _find_near_water(self, areas, buildings):
-        water_areas = [area for area in areas if area.type == "water"]
-        if water_areas:
-            area = random.choice(water_areas)
-            for _ in range(30):
-                if random.random() < 0.5:
-                    x = area.x + random.uniform(0, area.w)
-                    y = area.y + random.choice([-30, area.h + 30])
-                else:
-                    x = area.x + random.choice([-30, area.w + 30])
-                    y = area.y + random.uniform(0, area.h)
-                
-                if 50 < x < 1150 and 50 < y < 850:
-                    if not self._too_close_to_buildings(x, y, buildings):
-                        return (int(x), int(y))
-        
-        return None
+    def _find_near_water(self, terrain, buildings):
+        # Every shore cell already passes the fishing hut placement check.
+        candidates = []
+        for _ in range(30):
+            position = terrain.random_point("shore land", self.rng)
+            if position is None:
+                return None
+            candidates.append(position)
+        return self._first_clear(candidates, buildings)
     
     def _find_near_base(self, base_x, base_y, buildings, building_type):
+        candidates = []
         for _ in range(30):
-            angle = random.uniform(0, 2 * math.pi)
-            distance = random.uniform(40, 120)
-            x = base_x + distance * math.cos(angle)
-            y = base_y + distance * math.sin(angle)
-            
-            if 50 < x < 1150 and 50 < y < 850:
-                if not self._too_close_to_buildings(x, y, buildings):
-                    return (int(x), int(y))
-        
-        return None
+            angle = self.rng.uniform(0, 2 * math.pi)
+            distance = self.rng.uniform(40, 120)
+            candidates.append((base_x + distance * math.cos(angle),
+                               base_y + distance * math.sin(angle)))
+        return self._first_clear(candidates, buildings)
     
     def _find_random_position(self, buildings, WIDTH, HEIGHT):
-        for _ in range(50):
-            x = random.randint(50, WIDTH - 50)
-            y = random.randint(50, HEIGHT - 50)
-            
-            if not self._too_close_to_buildings(x, y, buildings):
-                return (int(x), int(y))
+        candidates = [(self.rng.randint(50, WIDTH - 50), self.rng.randint(50, HEIGHT - 50))
+                      for _ in range(50)]
+        position = self._first_clear(candidates, buildings, bounded=False)
+        if position:
+            return position
         
-        return (random.randint(50, WIDTH - 50), random.randint(50, HEIGHT - 50))
+        return (self.rng.randint(50, WIDTH - 50), self.rng.randint(50, HEIGHT - 50))
     
-    def _too_close_to_buildings(self, x, y, buildings, min_distance=40):
-        for building in buildings:
-            distance = math.sqrt((x - building.x) ** 2 + (y - building.y) ** 2)
-            if distance < min_distance:
-                return True
-        return False
+    def _first_clear(self, candidates, buildings, min_distance=40, bounded=True):
+        # Scores a whole batch of candidates at once and returns the first
+        # (in draw order) that is on the map and clear of other buildings.
+        xs = np.array([c[0] for c in candidates], dtype=np.float64)
+        ys = np.array([c[1] for c in candidates], dtype=np.float64)
+        ok = buildings.clear_of(xs, ys, min_distance)
+        if bounded:
+            ok &= (xs > 50) & (xs < self.width - 50) & (ys > 50) & (ys < self.height - 50)
+        hits = np.flatnonzero(ok)
+        if not hits.size:
+            return None
+        return (int(xs[hits[0]]), int(ys[hits[0]]))
     
     def can_afford_building(self, building_type, resources, building_costs):
         if building_type not in building_costs:
@@ -200,25 +192,53 @@ class AutoPlayer:
         cost = building_costs[building_type]
         return all(resources.get(resource, 0) >= cost[resource] for resource in cost)
     
-    def update(self, ants, buildings, resources, areas, food_sources, lumber_areas, water_areas, building_costs, current_frame):
-        if current_frame - self.last_analysis_time > self.analysis_cooldown:
-            analysis = self.analyze_colony_needs(ants, buildings, resources, areas, food_sources, lumber_areas, water_areas)
+    def attach(self, stats):
+        # Subscribe to the colony's events; the analysis is only rebuilt
+        # after something it reads has changed.
+        if self._stats is not None:
+            self._detach()
+        self._stats = stats
+        stats.listeners.append(self._on_colony_event)
+        stats.buildings.listeners.append(self._on_colony_event)
+        self._analysis = None
+    
+    def _detach(self):
+        for listeners in (self._stats.listeners, self._stats.buildings.listeners):
+            if self._on_colony_event in listeners:
+                listeners.remove(self._on_colony_event)
+        self._stats = None
+    
+    def _on_colony_event(self, event, subject):
+        self._analysis = None
+    
+    def update(self, stats, buildings, resources, areas, food_sources, lumber_areas, water_areas, building_costs, current_frame, terrain):
+        if stats is not self._stats:
+            self.attach(stats)
+        # Resources change every frame, so rather than an event per deposit
+        # only threshold crossings invalidate the analysis.
+        shortages = tuple(resources[r] < t for r, t in self.resource_thresholds.items())
+        if shortages != self._shortages:
+            self._shortages = shortages
+            self._analysis = None
+        if self._analysis is None:
+            self._analysis = self.analyze_colony_needs(stats, buildings, resources, areas, food_sources, lumber_areas, water_areas)
             self.last_analysis_time = current_frame
+        
+        if current_frame - self.last_building_time > self.building_cooldown:
+            for building_type, count, priority in self._analysis["recommended_buildings"]:
+                if self.can_afford_building(building_type, resources, building_costs):
+                    position = self.find_optimal_placement(building_type, areas, buildings, food_sources, lumber_areas, water_areas, terrain)
+                    if position:
+                        self.last_building_time = current_frame
+                        return {
+                            "action": "build",
+                            "building_type": building_type,
+                            "position": position,
+                            "priority": priority,
+                            "reason": f"Priority {priority}: {building_type}"
+                        }
             
-            if current_frame - self.last_building_time > self.building_cooldown:
-                for building_type, count, priority in analysis["recommended_buildings"]:
-                    if self.can_afford_building(building_type, resources, building_costs):
-                        position = self.find_optimal_placement(building_type, areas, buildings, food_sources, lumber_areas, water_areas)
-                        if position:
-                            return {
-                                "action": "build",
-                                "building_type": building_type,
-                                "position": position,
-                                "priority": priority,
-                                "reason": f"Priority {priority}: {building_type}"
-                            }
-                
-                self.last_building_time = current_frame
+            self.last_building_time = current_frame
         
         return {"action": "none"}
 
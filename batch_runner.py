@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from ant_colony import FPS, Simulation
+from auto_player import AutoPlayer
+from replay import ReplayLog
+
+TUNABLE_PARAMETERS = ("building_priorities", "resource_thresholds", "building_cooldown")
+
+
+def configure_auto_player(params, rng=None, width=1200, height=900):
+    auto_player = AutoPlayer(rng, width, height)
+    for name, value in params.items():
+        if name not in TUNABLE_PARAMETERS:
+            raise ValueError(f"Unknown AutoPlayer parameter: {name}")
+        current = getattr(auto_player, name)
+        if isinstance(current, dict):
+            current.update(value)
+        else:
+            setattr(auto_player, name, value)
+    return auto_player
+
+
+def run_job(seed, params_index, params, ticks, sample_every, replay_dir=None):
+    start = time.perf_counter()
+    sim = Simulation(seed=seed)
+    sim.auto_player = configure_auto_player(params, sim.streams.ai, sim.width, sim.height)
+
+    resource_curve = []
+    population_curve = []
+    peak_population = sim.stats.population
+    extinct_tick = None
+    for _ in range(ticks):
+        sim.update()
+        population = sim.stats.population
+        peak_population = max(peak_population, population)
+        if population == 0 and extinct_tick is None:
+            extinct_tick = sim.tick
+        if sim.tick % sample_every == 0:
+            resource_curve.append([sim.tick] + [sim.resources[r] for r in ("food", "wood", "fish")])
+            population_curve.append([sim.tick, population])
+
+    replay_path = None
+    if replay_dir is not None:
+        replay_path = os.path.join(replay_dir, f"seed{seed}_params{params_index}.replay.json")
+        ReplayLog.from_simulation(sim).save(replay_path)
+
+    return {
+        "seed": seed,
+        "params_index": params_index,
+        "params": params,
+        "ticks": sim.tick,
+        "final_population": sim.stats.population,
+        "peak_population": peak_population,
+        "survived": sim.stats.population > 0,
+        "extinct_tick": extinct_tick,
+        "final_resources": dict(sim.resources),
+        "resource_curve": resource_curve,
+        "population_curve": population_curve,
+        "build_order": [[tick, building_type] for tick, building_type, _, _, _ in sim.build_log],
+        "replay": replay_path,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def load_param_sets(path):
+    if path is None:
+        return [{}]
+    with open(path) as f:
+        param_sets = json.load(f)
+    if isinstance(param_sets, dict):
+        param_sets = [param_sets]
+    return param_sets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless AutoPlayer colonies across seeds and parameter sets")
+    parser.add_argument("--params", help="JSON file with a list of AutoPlayer parameter sets")
+    parser.add_argument("--seeds", type=int, default=4, help="number of seeds per parameter set")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=FPS * 60 * 10)
+    parser.add_argument("--sample-every", type=int, default=FPS * 10, help="ticks between resource curve samples")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="batch_results.jsonl")
+    parser.add_argument("--replay-dir", help="save a replay log for every job into this directory")
+    args = parser.parse_args(argv)
+
+    if args.replay_dir:
+        os.makedirs(args.replay_dir, exist_ok=True)
+
+    param_sets = load_param_sets(args.params)
+    for params in param_sets:
+        configure_auto_player(params)
+    jobs = [
+        (seed, i, params, args.ticks, args.sample_every, args.replay_dir)
+        for i, params in enumerate(param_sets)
+        for seed in range(args.first_seed, args.first_seed + args.seeds)
+    ]
+
+    print(f"Running {len(jobs)} jobs ({len(param_sets)} parameter sets x {args.seeds} seeds, {args.ticks} ticks each)")
+    done = 0
+    with open(args.out, "w") as out, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_job, *job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            done += 1
+            print(f"[{done}/{len(jobs)}] seed={result['seed']} params={result['params_index']} "
+                  f"population={result['final_population']} survived={result['survived']} ({result['elapsed']:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from ant_colony import BACKGROUND_COLOR, BUILDING_LIST, HEIGHT, WIDTH, Building, Simulation, draw_ui
+from auto_player import AutoPlayer
+from render_layers import StaticBackground
+from vector_engine import VectorSimulation
+
+VERSION = 1
+ANT_COUNTS = (30, 300, 3000, 30000, 100000)
+BUILDING_COUNTS = (10, 100, 1000)
+MAP_SIZES = ((WIDTH, HEIGHT), (WIDTH * 2, HEIGHT * 2), (WIDTH * 4, HEIGHT * 4))
+BASELINE_ANTS = 300
+BASELINE_BUILDINGS = 10
+ENGINES = {"object": Simulation, "vector": VectorSimulation}
+
+
+def scenarios():
+    for ants in ANT_COUNTS:
+        yield f"ants_{ants}", ants, BASELINE_BUILDINGS, (WIDTH, HEIGHT)
+    for buildings in BUILDING_COUNTS:
+        yield f"buildings_{buildings}", BASELINE_ANTS, buildings, (WIDTH, HEIGHT)
+    for width, height in MAP_SIZES:
+        yield f"map_{width}x{height}", BASELINE_ANTS, BASELINE_BUILDINGS, (width, height)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def populate_buildings(sim, count, seed):
+    # Placement bypasses costs and terrain rules so every run gets exactly
+    # `count` buildings spread over the whole map.
+    rng = random.Random(f"{seed}:benchmark")
+    types = [b["type"] for b in BUILDING_LIST]
+    while len(sim.buildings) < count:
+        building_type = types[len(sim.buildings) % len(types)]
+        sim.buildings.append(Building(rng.randint(20, sim.width - 20), rng.randint(20, sim.height - 20), building_type))
+
+
+def build(engine, ants, buildings, size, seed):
+    width, height = size
+    sim = ENGINES[engine](ants, width, height, seed=seed)
+    populate_buildings(sim, buildings, seed)
+    sim.auto_player = AutoPlayer(sim.streams.ai, width, height)
+    return sim
+
+
+def render_frame(sim, screen, background):
+    sources = sim.food_sources + sim.lumber_areas + sim.water_areas
+    background.update(sim.areas, sources, sim.buildings)
+    screen.blit(background.surface, (0, 0))
+    for ant in sim.sync_ants():
+        ant.draw(screen)
+    sim.queen.draw(screen)
+    draw_ui(screen, sim, "home")
+
+
+def phases(sim, render):
+    result = {
+        "auto_player_update": sim.run_auto_player,
+        "ant_update": sim.update_ants,
+        "queen_update": sim.update_queen,
+    }
+    if render:
+        screen = pygame.Surface((sim.width, sim.height))
+        background = StaticBackground((sim.width, sim.height), BACKGROUND_COLOR)
+        result["render"] = lambda: render_frame(sim, screen, background)
+    return result
+
+
+def run_tick(sim, steps, samples=None):
+    # Same order as Simulation.update, with each phase timed on its own.
+    for name, step in steps.items():
+        start = time.perf_counter()
+        step()
+        if samples is not None:
+            samples[name].append(time.perf_counter() - start)
+    sim.tick += 1
+
+
+def measure_peak_memory(sim, steps, ticks):
+    peaks = dict.fromkeys(steps, 0)
+    tracemalloc.start()
+    try:
+        for _ in range(ticks):
+            for name, step in steps.items():
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+                step()
+                peaks[name] = max(peaks[name], tracemalloc.get_traced_memory()[1] - current)
+            sim.tick += 1
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_scenario(engine, name, ants, buildings, size, seed, warmup, ticks, budget, memory_ticks):
+    sim = build(engine, ants, buildings, size, seed)
+    steps = phases(sim, render=engine == "object")
+    for _ in range(warmup):
+        run_tick(sim, steps)
+
+    samples = {phase: [] for phase in steps}
+    start = time.perf_counter()
+    measured = 0
+    while measured < ticks:
+        run_tick(sim, steps, samples)
+        measured += 1
+        if time.perf_counter() - start > budget:
+            break
+    peaks = measure_peak_memory(sim, steps, memory_ticks)
+
+    simulated = sum(sum(samples[phase]) for phase in steps if phase != "render")
+    return {
+        "name": name,
+        "engine": engine,
+        "ants": ants,
+        "buildings": buildings,
+        "width": size[0],
+        "height": size[1],
+        "ticks": measured,
+        "ticks_per_sec": measured / simulated if simulated else None,
+        "final_population": sim.stats.population,
+        "final_buildings": len(sim.buildings),
+        "phases": {
+            phase: {
+                "ticks_per_sec": len(times) / sum(times) if sum(times) else None,
+                "mean_ms": sum(times) / len(times) * 1000,
+                "p50_ms": percentile(times, 50) * 1000,
+                "p99_ms": percentile(times, 99) * 1000,
+                "peak_bytes": peaks[phase],
+            }
+            for phase, times in samples.items()
+        },
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["engine"], r["name"]): r for r in baseline["results"]}
+    for r in results:
+        old = previous.get((r["engine"], r["name"]))
+        if not old or not old["ticks_per_sec"] or not r["ticks_per_sec"]:
+            continue
+        change = r["ticks_per_sec"] / old["ticks_per_sec"] - 1
+        print(f"{r['engine']:>6} {r['name']:<20} {old['ticks_per_sec']:10.1f} -> {r['ticks_per_sec']:10.1f} ticks/s ({change:+.1%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation core at increasing ant, building and map sizes")
+    parser.add_argument("--engine", choices=sorted(ENGINES) + ["all"], default="all")
+    parser.add_argument("--only", metavar="PREFIX", help="only run scenarios whose name starts with PREFIX, e.g. ants_ or map_")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=5, help="untimed ticks before measuring")
+    parser.add_argument("--ticks", type=int, default=300, help="timed ticks per scenario")
+    parser.add_argument("--budget", type=float, default=10.0, help="stop a scenario early after this many seconds")
+    parser.add_argument("--memory-ticks", type=int, default=3, help="ticks run under tracemalloc for peak memory")
+    parser.add_argument("--label", default=None, help="free-form version label stored in the output")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="PATH", help="print ticks/s changes against an earlier results file")
+    args = parser.parse_args(argv)
+
+    engines = sorted(ENGINES) if args.engine == "all" else [args.engine]
+    results = []
+    for engine in engines:
+        for name, ants, buildings, size in scenarios():
+            if args.only and not name.startswith(args.only):
+                continue
+            result = run_scenario(engine, name, ants, buildings, size, args.seed, args.warmup, args.ticks, args.budget, args.memory_ticks)
+            results.append(result)
+            phase_summary = "  ".join(f"{phase} p50={p['p50_ms']:.2f}ms p99={p['p99_ms']:.2f}ms" for phase, p in result["phases"].items())
+            print(f"{engine:>6} {name:<20} {result['ticks_per_sec']:10.1f} ticks/s  {phase_summary}")
+
+    report = {
+        "version": VERSION,
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
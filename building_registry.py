@@ -0,0 +1,173 @@
+import math
+
+import numpy as np
+
+from entity_pool import EntityPool
+
+LINEAR_SCAN_LIMIT = 8
+# Packs a cell coordinate into one sortable int64 key for the batched query.
+CELL_KEY_STRIDE = 1 << 20
+
+
+class BuildingRegistry:
+    def __init__(self, buildings=(), cell_size=64, raster=None):
+        self.cell_size = cell_size
+        self.raster = raster
+        self._buildings = EntityPool()
+        self._order = {}
+        self._buckets = {}
+        self._grids = {}
+        self._cells = {}
+        self._extents = {}
+        self._sorted = None
+        # Callables taking (event, building), told after each placement.
+        self.listeners = []
+        for building in buildings:
+            self.append(building)
+
+    def __iter__(self):
+        return iter(self._buildings)
+
+    def __len__(self):
+        return len(self._buildings)
+
+    def __getitem__(self, index):
+        return self._buildings[index]
+
+    def get(self, handle):
+        return self._buildings.get(handle)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def append(self, building):
+        self._order[self._buildings.add(building)] = len(self._order)
+        self._buckets.setdefault(building.type, []).append(building)
+        if self.raster is not None:
+            self.raster.add(building.type, building.x, building.y)
+        cx, cy = self._cell(building.x, building.y)
+        self._grids.setdefault(building.type, {}).setdefault((cx, cy), []).append(building)
+        self._cells.setdefault((cx, cy), []).append(building)
+        self._sorted = None
+        extent = self._extents.get(building.type)
+        if extent is None:
+            self._extents[building.type] = (cx, cy, cx, cy)
+        else:
+            self._extents[building.type] = (min(extent[0], cx), min(extent[1], cy), max(extent[2], cx), max(extent[3], cy))
+        for listener in self.listeners:
+            listener("building placed", building)
+
+    def of_type(self, building_type):
+        return self._buckets.get(building_type, [])
+
+    def counts(self):
+        return {t: len(bucket) for t, bucket in self._buckets.items()}
+
+    def count(self, building_type):
+        return len(self._buckets.get(building_type, ()))
+
+    def first(self, building_type):
+        bucket = self._buckets.get(building_type)
+        return bucket[0] if bucket else None
+
+    def in_rect(self, rect):
+        # Buildings whose position lies inside `rect`, in placement order.
+        found = []
+        left, top = self._cell(rect.left, rect.top)
+        right, bottom = self._cell(rect.right, rect.bottom)
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                for b in self._cells.get((cx, cy), ()):
+                    if rect.collidepoint(b.x, b.y):
+                        found.append(b)
+        found.sort(key=lambda b: self._order[b.handle])
+        return found
+
+    def _sorted_cells(self):
+        # Building positions sorted by cell key, rebuilt after placements.
+        if self._sorted is None:
+            xs = np.array([b.x for b in self._buildings], dtype=np.float64)
+            ys = np.array([b.y for b in self._buildings], dtype=np.float64)
+            keys = (np.floor_divide(xs, self.cell_size).astype(np.int64) * CELL_KEY_STRIDE
+                    + np.floor_divide(ys, self.cell_size).astype(np.int64))
+            order = np.argsort(keys, kind="stable")
+            largest = max(len(cell) for cell in self._cells.values())
+            self._sorted = (keys[order], xs[order], ys[order], largest)
+        return self._sorted
+
+    def clear_of(self, xs, ys, radius):
+        # A mask of the candidates with no building closer than `radius`.
+        # Each neighbouring cell is one searchsorted over all candidates,
+        # then at most `largest` gathers per cell.
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        clear = np.ones(xs.shape, dtype=bool)
+        if not self._buildings or not xs.size:
+            return clear
+        keys, bx, by, largest = self._sorted_cells()
+        r2 = radius * radius
+        reach = int(math.ceil(radius / self.cell_size))
+        cx = np.floor_divide(xs, self.cell_size).astype(np.int64)
+        cy = np.floor_divide(ys, self.cell_size).astype(np.int64)
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                cell = (cx + dx) * CELL_KEY_STRIDE + (cy + dy)
+                lo = np.searchsorted(keys, cell, side="left")
+                hi = np.searchsorted(keys, cell, side="right")
+                for j in range(largest):
+                    hit = np.flatnonzero(lo + j < hi)
+                    if not hit.size:
+                        break
+                    i = lo[hit] + j
+                    near = (bx[i] - xs[hit]) ** 2 + (by[i] - ys[hit]) ** 2 < r2
+                    clear[hit[near]] = False
+        return clear
+
+    def nearest(self, building_type, x, y):
+        types = (building_type,) if isinstance(building_type, str) else building_type
+        best, best_d2 = None, math.inf
+        for t in types:
+            building, d2 = self._nearest_of_type(t, x, y)
+            if d2 < best_d2:
+                best, best_d2 = building, d2
+        return best
+
+    def _nearest_of_type(self, building_type, x, y):
+        bucket = self._buckets.get(building_type)
+        best, best_d2 = None, math.inf
+        if not bucket:
+            return best, best_d2
+
+        if self.raster is not None:
+            i = self.raster.lookup(building_type, x, y)
+            if i is not None:
+                b = bucket[i]
+                return b, (b.x - x) ** 2 + (b.y - y) ** 2
+
+        if len(bucket) <= LINEAR_SCAN_LIMIT:
+            for b in bucket:
+                d2 = (b.x - x) ** 2 + (b.y - y) ** 2
+                if d2 < best_d2:
+                    best, best_d2 = b, d2
+            return best, best_d2
+
+        grid = self._grids[building_type]
+        min_cx, min_cy, max_cx, max_cy = self._extents[building_type]
+        cx, cy = self._cell(x, y)
+        max_ring = max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+        for ring in range(max_ring + 1):
+            # Everything outside rings 0..ring-1 is at least (ring-1) cells away.
+            reach = (ring - 1) * self.cell_size
+            if best is not None and ring > 1 and best_d2 <= reach * reach:
+                break
+            for gx in range(max(cx - ring, min_cx), min(cx + ring, max_cx) + 1):
+                if abs(gx - cx) == ring:
+                    rows = range(max(cy - ring, min_cy), min(cy + ring, max_cy) + 1)
+                else:
+                    rows = [gy for gy in (cy - ring, cy + ring) if min_cy <= gy <= max_cy]
+                for gy in rows:
+                    for b in grid.get((gx, gy), ()):
+                        d2 = (b.x - x) ** 2 + (b.y - y) ** 2
+                        if d2 < best_d2:
+                            best, best_d2 = b, d2
+        return best, best_d2
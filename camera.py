@@ -0,0 +1,63 @@
+import pygame
+
+ZOOM_LEVELS = (0.5, 0.75, 1, 1.5, 2)
+
+
+class Camera:
+    def __init__(self, screen_size, world_size, zoom=1):
+        self.screen_w, self.screen_h = screen_size
+        self.world_w, self.world_h = world_size
+        self.zoom = zoom
+        self.x = (self.world_w - self.view_w) / 2
+        self.y = (self.world_h - self.view_h) / 2
+        self._surface = None
+        self.clamp()
+
+    @property
+    def view_w(self):
+        return int(self.screen_w / self.zoom)
+
+    @property
+    def view_h(self):
+        return int(self.screen_h / self.zoom)
+
+    @property
+    def view_rect(self):
+        return pygame.Rect(int(self.x), int(self.y), self.view_w, self.view_h)
+
+    @property
+    def surface(self):
+        # Off-screen target for zoomed frames; the world is drawn at 1:1 and
+        # scaled to the window once.
+        size = (self.view_w, self.view_h)
+        if self._surface is None or self._surface.get_size() != size:
+            self._surface = pygame.Surface(size)
+        return self._surface
+
+    def clamp(self):
+        self.x = min(max(self.x, 0), max(0, self.world_w - self.view_w))
+        self.y = min(max(self.y, 0), max(0, self.world_h - self.view_h))
+
+    def pan(self, dx, dy):
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.clamp()
+
+    def min_zoom(self):
+        return min(1, max(self.screen_w / self.world_w, self.screen_h / self.world_h))
+
+    def zoom_at(self, steps, screen_pos):
+        levels = [z for z in ZOOM_LEVELS if z >= self.min_zoom()] or [1]
+        current = min(range(len(levels)), key=lambda i: abs(levels[i] - self.zoom))
+        zoom = levels[min(max(current + steps, 0), len(levels) - 1)]
+        if zoom == self.zoom:
+            return
+        # Keep the world point under the cursor fixed.
+        wx, wy = self.to_world(screen_pos)
+        self.zoom = zoom
+        self.x = wx - screen_pos[0] / zoom
+        self.y = wy - screen_pos[1] / zoom
+        self.clamp()
+
+    def to_world(self, screen_pos):
+        return int(self.x + screen_pos[0] / self.zoom), int(self.y + screen_pos[1] / self.zoom)
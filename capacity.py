@@ -0,0 +1,76 @@
+CAPACITIES = {"school": 5, "home": 5}
+
+
+class CapacityIndex:
+    # Persistent occupancy for buildings that hold a fixed number of ants.
+    # Ants claim a slot by building handle and release it when they leave.
+    # Free slots are counted per type, so "everything is full" is O(1), and
+    # only the buildings that still have room are searched for the nearest;
+    # since ants claim eagerly, that is usually a handful.
+    def __init__(self, capacities=CAPACITIES):
+        self.capacities = dict(capacities)
+        self._buildings = {}
+        self._occupied = {}
+        self._total = {t: 0 for t in self.capacities}
+        self._free = {t: 0 for t in self.capacities}
+        self._open = {t: [] for t in self.capacities}
+        # Places given back so far, per type, for callers watching for
+        # buildings that open up again.
+        self.released = {t: 0 for t in self.capacities}
+
+    def track(self, building):
+        capacity = self.capacities.get(building.type)
+        if capacity is None:
+            return
+        self._buildings[building.handle] = building
+        self._occupied[building.handle] = 0
+        self._total[building.type] += capacity
+        self._free[building.type] += capacity
+        self._open[building.type].append(building)
+
+    def free(self, building_type):
+        return self._free.get(building_type, 0)
+
+    def capacity(self, building_type):
+        return self._total.get(building_type, 0)
+
+    def occupied(self, building_type):
+        return self.capacity(building_type) - self.free(building_type)
+
+    def occupancy(self, handle):
+        return self._occupied.get(handle, 0)
+
+    def nearest_open(self, building_type, x, y):
+        if not self._free.get(building_type):
+            return None
+        return min(self._open[building_type], key=lambda b: (b.x - x) ** 2 + (b.y - y) ** 2)
+
+    def claim(self, handle):
+        building = self._buildings[handle]
+        occupied = self._occupied[handle] + 1
+        if occupied > self.capacities[building.type]:
+            raise ValueError(f"{building.type} {handle} is full")
+        self._occupied[handle] = occupied
+        self._free[building.type] -= 1
+        if occupied == self.capacities[building.type]:
+            self._open[building.type].remove(building)
+
+    def claim_nearest(self, building_type, x, y):
+        # Handle of the slot taken, or None when every building is full.
+        building = self.nearest_open(building_type, x, y)
+        if building is None:
+            return None
+        self.claim(building.handle)
+        return building.handle
+
+    def release(self, handle):
+        building = self._buildings[handle]
+        occupied = self._occupied[handle]
+        self._occupied[handle] = occupied - 1
+        self._free[building.type] += 1
+        self.released[building.type] += 1
+        if occupied == self.capacities[building.type]:
+            # Back in the open list, in handle (placement) order.
+            opened = self._open[building.type]
+            opened.append(building)
+            opened.sort(key=lambda b: b.handle)
@@ -0,0 +1,102 @@
+class ColonyStats:
+    def __init__(self, buildings, ants=(), slots=None):
+        self.buildings = buildings
+        # The CapacityIndex holding home reservations, if ants get homes;
+        # without one, housing is estimated from the number of homes.
+        self.slots = slots
+        # Callables taking (event, subject), told about changes that move the
+        # headline counts: "ant born", "ant died", "ant matured", "mood
+        # changed" and "totals changed".
+        self.listeners = []
+        self.population = 0
+        self.adults = 0
+        self.happy = 0
+        self.hunger_total = 0.0
+        self.stamina_total = 0.0
+        for ant in ants:
+            self.add_ant(ant)
+
+    def _emit(self, event, subject):
+        for listener in self.listeners:
+            listener(event, subject)
+
+    def add_ant(self, ant):
+        self.population += 1
+        self.adults += ant.is_adult
+        self.happy += ant.is_happy()
+        self.hunger_total += ant.hunger
+        self.stamina_total += ant.stamina
+        if self.listeners:
+            self._emit("ant born", ant)
+
+    def remove_ant(self, ant):
+        self.population -= 1
+        self.adults -= ant.is_adult
+        self.happy -= ant.is_happy()
+        self.hunger_total -= ant.hunger
+        self.stamina_total -= ant.stamina
+        if self.listeners:
+            self._emit("ant died", ant)
+
+    def update_ant(self, ant, was_adult, was_happy, happy, old_hunger, old_stamina):
+        self.adults += ant.is_adult - was_adult
+        self.happy += happy - was_happy
+        self.hunger_total += ant.hunger - old_hunger
+        self.stamina_total += ant.stamina - old_stamina
+        if self.listeners:
+            if ant.is_adult != was_adult:
+                self._emit("ant matured", ant)
+            if happy != was_happy:
+                self._emit("mood changed", ant)
+
+    def set_totals(self, population, adults, happy, hunger_total, stamina_total):
+        changed = (population, adults, happy) != (self.population, self.adults, self.happy)
+        self.population = population
+        self.adults = adults
+        self.happy = happy
+        self.hunger_total = hunger_total
+        self.stamina_total = stamina_total
+        if changed and self.listeners:
+            self._emit("totals changed", self)
+
+    @property
+    def children(self):
+        return self.population - self.adults
+
+    @property
+    def unhappy(self):
+        return self.population - self.happy
+
+    def all_happy(self):
+        return self.population > 0 and self.happy == self.population
+
+    @property
+    def avg_hunger(self):
+        return self.hunger_total / max(1, self.population)
+
+    @property
+    def avg_stamina(self):
+        return self.stamina_total / max(1, self.population)
+
+    def building_counts(self):
+        return self.buildings.counts()
+
+    @property
+    def homes(self):
+        return self.buildings.count("home")
+
+    @property
+    def housing_capacity(self):
+        if self.slots is not None:
+            return self.slots.capacity("home")
+        return self.homes * 5
+
+    @property
+    def housed(self):
+        if self.slots is not None:
+            return self.slots.occupied("home")
+        return min(self.population, self.housing_capacity)
+
+    @property
+    def homeless(self):
+        return max(0, self.population - self.housed)
@@ -0,0 +1,186 @@
+import heapq
+from functools import reduce
+from itertools import chain, repeat
+from operator import add
+
+import numpy as np
+
+POSITION = ("x", "y")
+
+
+class CommuteScheduler:
+    # Ants whose next ticks only change fields linearly (walking a straight
+    # line at constant speed, getting hungrier, tiring) are taken off the
+    # per-tick loop. Each keeps the field values it had when it left plus a
+    # per-tick rate, and sits in a heap keyed by the tick it must be updated
+    # normally again. `drift` sums the rates of everything asleep, so totals
+    # such as ColonyStats.hunger_total can still move every tick. `key`, if
+    # given, maps an ant to its place in the per-tick order (e.g. its pool
+    # position); woken ants are put back in that order, so sleeping never
+    # changes which ant updates first.
+    def __init__(self, ants=(), key=None):
+        self.awake = list(ants)
+        self.key = key
+        self.drift = {}
+        self._heap = []
+        self._seq = 0
+        self._asleep = 0
+        self._unsorted = False
+
+    def __len__(self):
+        return self._asleep
+
+    def add(self, ant):
+        self.awake.append(ant)
+
+    def sleep(self, ant, start, ticks, rates):
+        # `start` is the first tick skipped; the ant is due again at
+        # start + ticks with those ticks applied.
+        wake = start + ticks
+        ant.commute = (start, wake, {name: getattr(ant, name) for name in rates}, rates)
+        for name, rate in rates.items():
+            self.drift[name] = self.drift.get(name, 0) + rate
+        heapq.heappush(self._heap, (wake, self._seq, ant))
+        self._seq += 1
+        self._asleep += 1
+
+    def _apply(self, ant, tick):
+        # Closed form, close enough for drawing.
+        start, wake, origin, rates = ant.commute
+        k = min(tick, wake) - start
+        for name, rate in rates.items():
+            setattr(ant, name, origin[name] + k * rate)
+
+    def _settle(self, ant, tick):
+        # update() adds a fixed step to fields such as hunger once per tick,
+        # and so does this rather than origin + k * rate, so a woken ant
+        # crosses thresholds such as hunger >= 70 on the same tick as one
+        # that never slept. x and y take the closed form: move_towards()
+        # works its direction out afresh each tick, so no sum is exact.
+        start, wake, origin, rates = ant.commute
+        k = min(tick, wake) - start
+        for name, rate in rates.items():
+            if name in POSITION:
+                setattr(ant, name, origin[name] + k * rate)
+            else:
+                setattr(ant, name, reduce(add, repeat(rate, k), origin[name]))
+
+    def _wake(self, ant, tick):
+        self._settle(ant, tick)
+        for name, rate in ant.commute[3].items():
+            self.drift[name] -= rate
+        ant.commute = None
+        self._asleep -= 1
+
+    def _current(self, ant, wake):
+        # Heap entries of ants woken early are left behind; an entry is live
+        # only while its ant still sleeps until that tick.
+        return ant.commute is not None and ant.commute[1] == wake
+
+    def begin_tick(self, tick):
+        # The ants to update this tick: everything awake plus sleepers that
+        # are due. Callers hand each back through keep() or sleep().
+        ants = self.awake
+        heap = self._heap
+        while heap and heap[0][0] <= tick:
+            wake, _, ant = heapq.heappop(heap)
+            if self._current(ant, wake):
+                self._wake(ant, tick)
+                ants.append(ant)
+                self._unsorted = True
+        if not self._asleep:
+            self.drift = {}
+        if self._unsorted and self.key is not None:
+            ants.sort(key=self.key)
+        self._unsorted = False
+        self.awake = []
+        return ants
+
+    def keep(self, ant):
+        self.awake.append(ant)
+
+    def sleepers(self):
+        # Sleeping ants, soonest due first.
+        return [ant for wake, _, ant in sorted(self._heap) if self._current(ant, wake)]
+
+    def wake(self, ant, tick):
+        # Put one sleeper back on the per-tick loop from `tick`, with the
+        # ticks before it applied, e.g. because something it waits for
+        # turned up.
+        if ant.commute is not None:
+            self._wake(ant, tick)
+            self.awake.append(ant)
+            self._unsorted = True
+
+    def reorder(self):
+        # The per-tick order changed under the awake ants, e.g. the pool
+        # moved one into a removed ant's place; sort them again next tick.
+        self._unsorted = True
+
+    def wake_all(self, tick, ants):
+        # Bring every sleeper up to `tick` and go back to updating all of
+        # `ants`, in that order, each tick.
+        for wake, _, ant in self._heap:
+            if self._current(ant, wake):
+                self._wake(ant, tick)
+        self._heap = []
+        self._asleep = 0
+        self.drift = {}
+        self.awake = list(ants)
+        self._unsorted = False
+
+    def state(self, position):
+        # Bookkeeping for serialisation, with ants named by position[id(ant)].
+        # Sleepers keep their commutes, so a restored scheduler wakes them on
+        # the same ticks, in the same order, with the same values. `origin`
+        # and `rates` have a row of `names` per sleeper; sleep() fills both
+        # dicts in rate order, so their values line up.
+        sleepers = [entry for entry in self._heap if self._current(entry[2], entry[0])]
+        commutes = [entry[2].commute for entry in sleepers]
+        names = list(commutes[0][3]) if commutes else []
+        count = len(sleepers)
+        shape = (count, len(names))
+        return {
+            "awake": np.fromiter((position[id(ant)] for ant in self.awake), np.int64, len(self.awake)),
+            "sleepers": np.fromiter((position[id(entry[2])] for entry in sleepers), np.int64, count),
+            "seq": np.fromiter((entry[1] for entry in sleepers), np.int64, count),
+            "start": np.fromiter((commute[0] for commute in commutes), np.int64, count),
+            "wake": np.fromiter((commute[1] for commute in commutes), np.int64, count),
+            "names": names,
+            "origin": np.fromiter(chain.from_iterable(c[2].values() for c in commutes), np.float64, shape[0] * shape[1]).reshape(shape),
+            "rates": np.fromiter(chain.from_iterable(c[3].values() for c in commutes), np.float64, shape[0] * shape[1]).reshape(shape),
+            "next_seq": self._seq,
+            "drift": dict(self.drift),
+        }
+
+    @classmethod
+    def restore(cls, ants, state, key=None):
+        # Rebuild from state() and the ants in position order.
+        scheduler = cls(key=key)
+        scheduler.awake = [ants[i] for i in np.asarray(state["awake"]).tolist()]
+        names = state["names"]
+        columns = [np.asarray(state[key]).tolist() for key in ("sleepers", "seq", "start", "wake", "origin", "rates")]
+        for i, seq, start, wake, origin, rates in zip(*columns):
+            ant = ants[i]
+            ant.commute = (start, wake, dict(zip(names, origin)), dict(zip(names, rates)))
+            scheduler._heap.append((wake, seq, ant))
+        heapq.heapify(scheduler._heap)
+        scheduler._asleep = len(scheduler._heap)
+        scheduler._seq = state["next_seq"]
+        scheduler.drift = dict(state["drift"])
+        return scheduler
+
+    def interpolate(self, tick, ants=None):
+        # Write current values into sleeping ants (all of them, or those
+        # among `ants`) for drawing; they stay asleep.
+        if ants is None:
+            ants = [ant for _, _, ant in self._heap]
+        for ant in ants:
+            if ant.commute is not None:
+                self._apply(ant, tick)
+
+    def path(self, ant):
+        # Start and end of a sleeping ant's straight walk.
+        start, wake, origin, rates = ant.commute
+        ticks = wake - start
+        return origin["x"], origin["y"], origin["x"] + ticks * rates["x"], origin["y"] + ticks * rates["y"]
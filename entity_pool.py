@@ -0,0 +1,93 @@
+INDEX_BITS = 24
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+class EntityPool:
+    # Packed storage for entities that come and go. Entities sit in a dense
+    # list, so iterating is a plain list walk, and removal moves the last
+    # entity into the hole. Each is named by an integer handle: the slot in
+    # the low INDEX_BITS and the slot's generation above them. Freed slots
+    # are reused with the generation bumped, so a stale handle never finds
+    # the newer entity. An entity's current handle is kept on `entity.handle`.
+    def __init__(self, entities=()):
+        self._dense = []
+        self._dense_slot = []
+        self._where = []
+        self._generation = []
+        self._free = []
+        for entity in entities:
+            self.add(entity)
+
+    def __len__(self):
+        return len(self._dense)
+
+    def __iter__(self):
+        return iter(self._dense)
+
+    def __getitem__(self, position):
+        return self._dense[position]
+
+    def __contains__(self, handle):
+        return self.get(handle) is not None
+
+    def position(self, entity):
+        # Where a live entity sits in iteration order.
+        return self._where[entity.handle & INDEX_MASK]
+
+    def add(self, entity):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._where)
+            self._where.append(-1)
+            self._generation.append(0)
+        self._where[slot] = len(self._dense)
+        self._dense.append(entity)
+        self._dense_slot.append(slot)
+        entity.handle = self._generation[slot] << INDEX_BITS | slot
+        return entity.handle
+
+    def get(self, handle):
+        slot = handle & INDEX_MASK
+        if slot < len(self._where) and self._generation[slot] == handle >> INDEX_BITS:
+            position = self._where[slot]
+            if position >= 0:
+                return self._dense[position]
+        return None
+
+    def remove(self, handle):
+        entity = self.get(handle)
+        if entity is None:
+            raise KeyError(f"Stale or unknown handle: {handle}")
+        slot = handle & INDEX_MASK
+        position = self._where[slot]
+        last = self._dense.pop()
+        last_slot = self._dense_slot.pop()
+        if position < len(self._dense):
+            self._dense[position] = last
+            self._dense_slot[position] = last_slot
+            self._where[last_slot] = position
+        self._where[slot] = -1
+        self._generation[slot] += 1
+        self._free.append(slot)
+        return entity
+
+    def state(self):
+        # Slot bookkeeping for serialisation; entities are stored separately
+        # in dense order.
+        return {"slots": list(self._dense_slot), "generations": list(self._generation), "free": list(self._free)}
+
+    @classmethod
+    def restore(cls, entities, state):
+        # Rebuild a pool from entities in dense order and state(), so every
+        # handle, and the handles of future additions, match the original.
+        pool = cls()
+        pool._dense = list(entities)
+        pool._dense_slot = [int(slot) for slot in state["slots"]]
+        pool._generation = [int(g) for g in state["generations"]]
+        pool._free = [int(slot) for slot in state["free"]]
+        pool._where = [-1] * len(pool._generation)
+        for position, (entity, slot) in enumerate(zip(pool._dense, pool._dense_slot)):
+            pool._where[slot] = position
+            entity.handle = pool._generation[slot] << INDEX_BITS | slot
+        return pool
@@ -0,0 +1,48 @@
+import time
+
+SPEED_MULTIPLIERS = (1, 4, 16, None)
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate, speed=1, max_ticks_per_frame=64, frame_budget=0.012, max_frame_time=0.25):
+        self.tick_time = 1 / tick_rate
+        self.speed = speed
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.frame_budget = frame_budget
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    @property
+    def label(self):
+        return "max" if self.speed is None else f"{self.speed}x"
+
+    def set_speed(self, speed):
+        self.speed = speed
+        self.accumulator = 0.0
+
+    def advance(self, frame_time, step):
+        deadline = time.perf_counter() + self.frame_budget
+        ticks = 0
+        if self.speed is None:
+            # Fast-forward: spend the whole frame budget on ticks.
+            while True:
+                step()
+                ticks += 1
+                if time.perf_counter() >= deadline:
+                    break
+            self.accumulator = 0.0
+            return ticks
+
+        self.accumulator += min(frame_time, self.max_frame_time) * self.speed
+        while self.accumulator >= self.tick_time:
+            if ticks >= self.max_ticks_per_frame or (ticks and time.perf_counter() >= deadline):
+                # Out of budget for this frame: drop the backlog instead of
+                # carrying it forward and falling further behind.
+                self.dropped_time += self.accumulator
+                self.accumulator = 0.0
+                break
+            step()
+            ticks += 1
+            self.accumulator -= self.tick_time
+        return ticks
@@ -0,0 +1,182 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+HISTOGRAM_BUCKETS_MS = (1, 2, 4, 8, 16.7, 33.3, 50, 100)
+GRAPH_SCALE_MS = 50
+OVERLAY_SIZE = (360, 220)
+TEXT_REFRESH_FRAMES = 30
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class FrameProfiler:
+    def __init__(self, history=600, target_ms=1000 / 60):
+        self.history = history
+        self.target_ms = target_ms
+        self.phases = []
+        self.current = {}
+        self.frames = deque(maxlen=history)
+        self.totals = deque(maxlen=history)
+        self.frame_count = 0
+        self.session = {}
+        self._phase_objects = {}
+        self._frame_start = None
+        self._overlay = None
+        self._text = None
+        self._text_frame = -TEXT_REFRESH_FRAMES
+
+    def phase(self, name):
+        # Time spent in a phase is summed over the frame, so a phase that
+        # runs once per simulation tick reports its cost per rendered frame.
+        phase = self._phase_objects.get(name)
+        if phase is None:
+            phase = self._phase_objects[name] = _Phase(self, name)
+            self.phases.append(name)
+        return phase
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+        self.current = {}
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        total = (time.perf_counter() - self._frame_start) * 1000
+        sample = {name: seconds * 1000 for name, seconds in self.current.items()}
+        self.frames.append(sample)
+        self.totals.append(total)
+        self.frame_count += 1
+        for name, ms in list(sample.items()) + [("frame", total)]:
+            stats = self.session.get(name)
+            if stats is None:
+                stats = self.session[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "histogram": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)}
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["histogram"][_bucket(ms)] += 1
+        self._frame_start = None
+
+    def samples(self, name):
+        if name == "frame":
+            return list(self.totals)
+        return [frame.get(name, 0.0) for frame in self.frames]
+
+    def histogram(self, name):
+        counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for ms in self.samples(name):
+            counts[_bucket(ms)] += 1
+        return counts
+
+    def summary(self, name):
+        samples = sorted(self.samples(name))
+        if not samples:
+            return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "mean_ms": sum(samples) / len(samples),
+            "p50_ms": _percentile(samples, 50),
+            "p95_ms": _percentile(samples, 95),
+            "p99_ms": _percentile(samples, 99),
+            "max_ms": samples[-1],
+        }
+
+    def draw(self, screen, pos, font):
+        if self._overlay is None:
+            self._overlay = pygame.Surface(OVERLAY_SIZE, pygame.SRCALPHA)
+        overlay = self._overlay
+        width, height = OVERLAY_SIZE
+        graph_height = 80
+        overlay.fill((0, 0, 0, 180))
+
+        scale = graph_height / GRAPH_SCALE_MS
+        totals = list(self.totals)[-width:]
+        x0 = width - len(totals)
+        for i, ms in enumerate(totals):
+            bar = min(graph_height, ms * scale)
+            color = (80, 220, 80) if ms <= self.target_ms else (240, 80, 60)
+            pygame.draw.line(overlay, color, (x0 + i, graph_height), (x0 + i, graph_height - bar))
+        target_y = graph_height - self.target_ms * scale
+        pygame.draw.line(overlay, (255, 255, 255), (0, target_y), (width, target_y))
+
+        if self._text is None or self.frame_count - self._text_frame >= TEXT_REFRESH_FRAMES:
+            self._text = self._render_text(font)
+            self._text_frame = self.frame_count
+        y = graph_height + 4
+        for line in self._text:
+            overlay.blit(line, (6, y))
+            y += line.get_height()
+        return screen.blit(overlay, pos)
+
+    def _render_text(self, font):
+        frame = self.summary("frame")
+        lines = [f"frame  avg {frame['mean_ms']:5.1f}  p99 {frame['p99_ms']:5.1f}  max {frame['max_ms']:5.1f} ms"]
+        for name in self.phases:
+            s = self.summary(name)
+            lines.append(f"{name:<12} avg {s['mean_ms']:5.2f}  p99 {s['p99_ms']:5.2f} ms")
+        return [font.render(line, True, (255, 255, 255)) for line in lines]
+
+    def export(self, path):
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "total_ms"] + self.phases)
+                first = self.frame_count - len(self.frames)
+                for i, (sample, total) in enumerate(zip(self.frames, self.totals)):
+                    writer.writerow([first + i, round(total, 4)] + [round(sample.get(name, 0.0), 4) for name in self.phases])
+            return
+        data = {
+            "frames": self.frame_count,
+            "target_ms": self.target_ms,
+            "histogram_buckets_ms": list(HISTOGRAM_BUCKETS_MS),
+            "window": {name: dict(self.summary(name), histogram=self.histogram(name)) for name in ["frame"] + self.phases},
+            "session": self.session,
+            "recent_frames": [dict(sample, total=total) for sample, total in zip(self.frames, self.totals)],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def _bucket(ms):
+    for i, edge in enumerate(HISTOGRAM_BUCKETS_MS):
+        if ms < edge:
+            return i
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
@@ -0,0 +1,34 @@
+import pygame
+
+
+class TextCache:
+    def __init__(self, font, limit=1024):
+        self.font = font
+        self.limit = limit
+        self._cache = {}
+
+    def render(self, text, color):
+        key = (text, color)
+        surface = self._cache.get(key)
+        if surface is None:
+            if len(self._cache) >= self.limit:
+                self._cache.clear()
+            surface = self.font.render(text, True, color)
+            self._cache[key] = surface
+        return surface
+
+
+class HudPanel:
+    def __init__(self, size, render):
+        self.size = size
+        self.render = render
+        self.surface = None
+        self._key = None
+
+    def draw(self, screen, pos, key):
+        if self.surface is None or key != self._key:
+            surface = pygame.Surface(self.size, pygame.SRCALPHA)
+            self.render(surface, key)
+            self.surface = surface
+            self._key = key
+        return screen.blit(self.surface, pos)
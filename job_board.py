@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+
+# Extra trip length, in pixels, charged per ant already heading to a source.
+CROWDING_COST = 40
+# How much faster sources of a resource crowd as it fills the stockpile: a
+# resource that is all of it crowds 1 + STOCK_BIAS times as fast.
+STOCK_BIAS = 4
+DROP_OFFS = {"fish": "fishing hut", "wood": "lumber camp"}
+RESOURCE_TYPES = ("food", "wood", "fish")
+# Cost-matrix cells per assignment chunk (8 MB of float64 per temporary).
+ASSIGN_BUDGET = 1 << 20
+
+
+class JobBoard:
+    # Colony-level gather assignment. Idle ants post a request while they
+    # update and dispatch() hands out sources for the whole tick in one
+    # batch, trading the round trip (ant -> source -> drop-off) against how
+    # many ants already work each source and how much of that resource the
+    # colony has stockpiled. `load` counts the ants currently sent to each
+    # source; an ant's claim is released when it picks up its cargo or dies.
+    def __init__(self, sources, crowding=CROWDING_COST):
+        self.sources = sources
+        self.crowding = crowding
+        self.source_x = np.array([s.x for s in sources], dtype=np.float64)
+        self.source_y = np.array([s.y for s in sources], dtype=np.float64)
+        self.load = np.zeros(len(sources), dtype=np.int64)
+        self._index = {id(s): i for i, s in enumerate(sources)}
+        self._haul = None
+        self._building_count = -1
+        self._pending = []
+
+    def recount(self, targets):
+        # Rebuild `load` from per-ant source indices (-1 for none).
+        targets = np.asarray(targets)
+        self.load = np.bincount(targets[targets >= 0], minlength=len(self.sources)).astype(np.int64)
+
+    def unclaim(self, targets):
+        targets = np.asarray(targets)
+        np.subtract.at(self.load, targets[targets >= 0], 1)
+
+    def _haul_lengths(self, buildings):
+        # Source -> drop-off distances; drop-offs only move when a building
+        # is placed, so this is rebuilt lazily.
+        if self._building_count != len(buildings):
+            base = buildings.first("base")
+            haul = np.zeros(len(self.sources))
+            for i, source in enumerate(self.sources):
+                drop = None
+                if source.type in DROP_OFFS:
+                    drop = buildings.nearest(DROP_OFFS[source.type], source.x, source.y)
+                drop = drop or base
+                if drop is not None:
+                    haul[i] = math.hypot(drop.x - source.x, drop.y - source.y)
+            self._haul = haul
+            self._building_count = len(buildings)
+        return self._haul
+
+    def _stock_weights(self, resources):
+        # Per-source multiplier on the crowding charge. It scales the queue
+        # rather than the trip, so a source beside its drop-off still fills
+        # up once the colony has plenty of what it yields.
+        total = max(1, sum(resources.get(r, 0) for r in RESOURCE_TYPES))
+        weight = {r: 1 + STOCK_BIAS * max(0, resources.get(r, 0)) / total for r in RESOURCE_TYPES}
+        return np.array([weight.get(s.type, 1) for s in self.sources])
+
+    def assign(self, xs, ys, buildings, resources):
+        # Source indices for gatherers at (xs, ys), claimed greedily in order
+        # so each pick sees the crowding caused by the ones before it.
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        picked = np.empty(len(xs), dtype=np.intp)
+        if not len(xs):
+            return picked
+        haul = self._haul_lengths(buildings)
+        crowding = self.crowding * self._stock_weights(resources)
+        load = self.load
+        chunk = max(1, ASSIGN_BUDGET // len(self.sources))
+        for start in range(0, len(xs), chunk):
+            stop = start + chunk
+            trip = np.hypot(xs[start:stop, None] - self.source_x, ys[start:stop, None] - self.source_y)
+            cost = trip + haul
+            for k, row in enumerate(cost, start):
+                i = int(np.argmin(row + crowding * load))
+                picked[k] = i
+                load[i] += 1
+        return picked
+
+    def request(self, ant):
+        self._pending.append(ant)
+
+    def release(self, ant):
+        self.load[self._index[id(ant.target)]] -= 1
+        ant.target = None
+
+    def forget(self, ant):
+        # For ants leaving the colony: drop their claim or open request.
+        if ant.target is not None:
+            self.release(ant)
+        elif ant in self._pending:
+            self._pending.remove(ant)
+
+    def dispatch(self, buildings, resources):
+        pending = self._pending
+        self._pending = []
+        if not pending or not self.sources:
+            return
+        xs = [ant.x for ant in pending]
+        ys = [ant.y for ant in pending]
+        for ant, i in zip(pending, self.assign(xs, ys, buildings, resources).tolist()):
+            ant.target = self.sources[i]
+            ant.walk_to_target(self)
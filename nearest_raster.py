@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+
+# Cells per building type (8 bytes each); larger worlds get coarser cells,
+# e.g. 11 px instead of 4 px at 12000x9000, so each type stays near 8 MB.
+MAX_CELLS = 1 << 20
+
+
+class NearestRaster:
+    def __init__(self, width, height, cell_size=4, max_cells=MAX_CELLS):
+        cell_size = max(cell_size, math.ceil(math.sqrt(width * height / max_cells)))
+        while -(-width // cell_size) * -(-height // cell_size) > max_cells:
+            cell_size += 1
+        self.cell_size = cell_size
+        self.cols = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self._centre_x = (np.arange(self.cols, dtype=np.float32) + 0.5) * cell_size
+        self._centre_y = (np.arange(self.rows, dtype=np.float32) + 0.5) * cell_size
+        self._index = {}
+        self._dist2 = {}
+        self._counts = {}
+
+    def add(self, building_type, x, y):
+        if building_type not in self._index:
+            self._index[building_type] = np.full((self.rows, self.cols), -1, dtype=np.int32)
+            self._dist2[building_type] = np.full((self.rows, self.cols), np.inf, dtype=np.float32)
+            self._counts[building_type] = 0
+        index = self._index[building_type]
+        dist2 = self._dist2[building_type]
+        i = self._counts[building_type]
+        self._counts[building_type] = i + 1
+
+        # The cells a new site takes over form a convex region around it, so
+        # the window only has to grow while its unclipped border still changes.
+        cx = min(max(int(x // self.cell_size), 0), self.cols - 1)
+        cy = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        half = 8
+        while True:
+            c0, c1 = max(0, cx - half), min(self.cols, cx + half + 1)
+            r0, r1 = max(0, cy - half), min(self.rows, cy + half + 1)
+            d2 = (self._centre_x[None, c0:c1] - x) ** 2 + (self._centre_y[r0:r1, None] - y) ** 2
+            closer = d2 < dist2[r0:r1, c0:c1]
+            dist2[r0:r1, c0:c1][closer] = d2[closer]
+            index[r0:r1, c0:c1][closer] = i
+            grow = (
+                (r0 > 0 and closer[0].any())
+                or (r1 < self.rows and closer[-1].any())
+                or (c0 > 0 and closer[:, 0].any())
+                or (c1 < self.cols and closer[:, -1].any())
+            )
+            if not grow:
+                break
+            half *= 2
+
+    def lookup(self, building_type, x, y):
+        index = self._index.get(building_type)
+        if index is None:
+            return -1
+        col = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return int(index[row, col])
+        return None
+
+    def lookup_many(self, building_type, xs, ys):
+        index = self._index.get(building_type)
+        if index is None:
+            return np.full(len(xs), -1, dtype=np.int32)
+        cols = np.clip((xs // self.cell_size).astype(np.intp), 0, self.cols - 1)
+        rows = np.clip((ys // self.cell_size).astype(np.intp), 0, self.rows - 1)
+        return index[rows, cols]
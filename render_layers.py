@@ -0,0 +1,93 @@
+import pygame
+
+from world_gen import RectGrid
+
+
+class StaticBackground:
+    # Sprites are anchored at their centre, so look this far past the view
+    # edges for things that still overlap it.
+    SPRITE_MARGIN = 32
+
+    def __init__(self, size, color):
+        self.size = size
+        self.color = color
+        self.surface = None
+        self.view = None
+        self._drawn_buildings = 0
+        self._areas = None
+        self._sources = None
+
+    def invalidate(self):
+        self.surface = None
+        self._areas = None
+        self._sources = None
+
+    def update(self, areas, sources, buildings, view=None):
+        # With a view rect only what overlaps it is drawn, offset so the
+        # view's top-left lands at (0, 0), and any camera move redraws.
+        if self.surface is None or view != self.view:
+            self._redraw(areas, sources, buildings, view)
+            return True
+        if self._drawn_buildings == len(buildings):
+            return False
+        new = buildings[self._drawn_buildings:]
+        self._drawn_buildings = len(buildings)
+        if view is not None:
+            bounds = view.inflate(2 * self.SPRITE_MARGIN, 2 * self.SPRITE_MARGIN)
+            new = [b for b in new if bounds.collidepoint(b.x, b.y)]
+        self._draw(new)
+        return bool(new)
+
+    def _redraw(self, areas, sources, buildings, view):
+        size = self.size if view is None else view.size
+        if self.surface is None or self.surface.get_size() != tuple(size):
+            self.surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                self.surface = self.surface.convert()
+        self.surface.fill(self.color)
+        self.view = None if view is None else view.copy()
+        self._drawn_buildings = len(buildings)
+        if view is None:
+            self._draw(areas)
+            self._draw(sources)
+            self._draw(buildings)
+            return
+        if self._areas is None:
+            self._index(areas, sources)
+        bounds = view.inflate(2 * self.SPRITE_MARGIN, 2 * self.SPRITE_MARGIN)
+        self._draw(self._areas.query(bounds))
+        self._draw(self._sources.query(bounds))
+        self._draw(buildings.in_rect(bounds))
+
+    def _index(self, areas, sources):
+        self._areas = RectGrid()
+        for area in areas:
+            self._areas.add(area.rect, area)
+        self._sources = RectGrid()
+        for src in sources:
+            self._sources.add(pygame.Rect(src.x, src.y, 1, 1), src)
+
+    def _draw(self, items):
+        if self.view is None:
+            for item in items:
+                item.draw(self.surface)
+            return
+        ox, oy = self.view.topleft
+        for item in items:
+            item.draw(self.surface, ox, oy)
+
+
+class DirtyRectPresenter:
+    def __init__(self):
+        self._previous = []
+
+    def erase(self, screen, background):
+        for rect in self._previous:
+            screen.blit(background, rect, rect)
+
+    def present(self, rects, full=False):
+        if full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._previous + rects)
+        self._previous = rects
@@ -0,0 +1,83 @@
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from ant_colony import Simulation
+
+
+class ReplayLog:
+    VERSION = 2
+
+    def __init__(self, seed, ant_count, width, height, actions=(), ticks=0):
+        self.seed = seed
+        self.ant_count = ant_count
+        self.width = width
+        self.height = height
+        self.actions = [tuple(action) for action in actions]
+        self.ticks = ticks
+
+    @classmethod
+    def from_simulation(cls, sim):
+        return cls(sim.seed, sim.ant_count, sim.width, sim.height, sim.build_log, sim.tick)
+
+    def save(self, path):
+        data = {
+            "version": self.VERSION,
+            "seed": self.seed,
+            "ant_count": self.ant_count,
+            "width": self.width,
+            "height": self.height,
+            "ticks": self.ticks,
+            "actions": self.actions,
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported replay version: {data.get('version')}")
+        return cls(data["seed"], data["ant_count"], data["width"], data["height"], data["actions"], data["ticks"])
+
+
+def replay(log, ticks=None, sim_class=Simulation):
+    sim = sim_class(log.ant_count, log.width, log.height, seed=log.seed)
+    target = log.ticks if ticks is None else ticks
+    actions = sorted(log.actions, key=lambda action: action[0])
+    next_action = 0
+    while sim.tick < target:
+        while next_action < len(actions) and actions[next_action][0] <= sim.tick:
+            _, building_type, x, y, source = actions[next_action]
+            if sim.place_building(x, y, building_type, source) is None:
+                print(f"Replay diverged at tick {sim.tick}: could not afford {building_type}")
+            next_action += 1
+        sim.update()
+    return sim
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded colony headless")
+    parser.add_argument("log")
+    parser.add_argument("--ticks", type=int, default=None, help="stop after this many ticks instead of the recorded length")
+    parser.add_argument("--profile", metavar="OUT", help="run under cProfile and write stats to OUT")
+    args = parser.parse_args()
+
+    log = ReplayLog.load(args.log)
+    start = time.perf_counter()
+    if args.profile:
+        profiler = cProfile.Profile()
+        sim = profiler.runcall(replay, log, args.ticks)
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+    else:
+        sim = replay(log, args.ticks)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {sim.tick} ticks with {len(log.actions)} build actions in {elapsed:.2f}s")
+    print(f"Ants: {sim.stats.population}  Buildings: {len(sim.buildings)}  Resources: {sim.resources}")
@@ -0,0 +1,12 @@
+import random
+
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        # String seeds are hashed with SHA-512, so each stream is stable
+        # across runs and processes regardless of PYTHONHASHSEED.
+        self.world = random.Random(f"{seed}:world")
+        self.ai = random.Random(f"{seed}:ai")
@@ -0,0 +1,312 @@
+import json
+import os
+import struct
+import traceback
+
+import numpy as np
+
+from ant_colony import Area, Building, FoodSource, Queen
+from building_registry import BuildingRegistry
+from colony_stats import ColonyStats
+from ant_grid import AntGrid
+from commute import CommuteScheduler
+from entity_pool import EntityPool
+from job_board import JobBoard
+from nearest_raster import NearestRaster
+from terrain import TerrainMap
+from vector_engine import AntArrays, VectorSimulation
+
+MAGIC = b"ANTSNAP1"
+VERSION = 1
+ALIGN = 64
+
+BUILDING_TYPES = ["base", "home", "bonfire", "school", "fishing hut", "lumber camp", "hub"]
+SOURCE_TYPES = ["food", "wood", "fish"]
+AREA_TYPES = ["water", "lumber", "mountain", "sand", "flowers", "grass"]
+
+
+def _align(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def _type_codes(items, table):
+    for item in items:
+        if item.type not in table:
+            table.append(item.type)
+    return np.array([table.index(item.type) for item in items], dtype=np.int8)
+
+
+def _rng_state(rng):
+    version, state, gauss = rng.getstate()
+    return [version, list(state), gauss]
+
+
+def _set_rng_state(rng, state):
+    version, internal, gauss = state
+    rng.setstate((version, tuple(internal), gauss))
+
+
+def _commute_arrays(ants, state, tick):
+    # Commuters are saved asleep. Their fields in `ants` get the values they
+    # have at `tick`, worked out from the commute as CommuteScheduler does.
+    sleepers = state["sleepers"]
+    arrays = {
+        "commute_awake": state["awake"].astype(np.int32),
+        "commute_ant": sleepers.astype(np.int32),
+        "commute_seq": state["seq"],
+        "commute_start": state["start"],
+        "commute_wake": state["wake"],
+        "commute_origin": state["origin"],
+        "commute_rates": state["rates"],
+    }
+    ticks = np.minimum(tick, arrays["commute_wake"]) - arrays["commute_start"]
+    current = arrays["commute_origin"] + ticks[:, None] * arrays["commute_rates"]
+    for j, name in enumerate(state["names"]):
+        getattr(ants, name)[sleepers] = current[:, j]
+    return arrays
+
+
+def _collect(sim):
+    sources = sim.food_sources + sim.lumber_areas + sim.water_areas
+    commutes = None
+    if isinstance(sim.ants, AntArrays):
+        ants = sim.ants
+    else:
+        ants = AntArrays.from_ants(sim.ants, sources)
+        commutes = sim.commutes.state({id(ant): i for i, ant in enumerate(sim.ants)})
+    building_types = list(BUILDING_TYPES)
+    source_types = list(SOURCE_TYPES)
+    area_types = list(AREA_TYPES)
+
+    arrays = {"ant_" + name: getattr(ants, name) for name in AntArrays.FIELDS}
+    if isinstance(sim.ants, EntityPool):
+        # Slot bookkeeping so ant handles survive the round trip.
+        pool = sim.ants.state()
+        arrays["ant_slot"] = np.array(pool["slots"], dtype=np.int32)
+        arrays["ant_pool_generation"] = np.array(pool["generations"], dtype=np.int32)
+        arrays["ant_pool_free"] = np.array(pool["free"], dtype=np.int32)
+        arrays["ant_home"] = np.array([-1 if ant.home is None else ant.home for ant in sim.ants], dtype=np.int32)
+    if commutes is not None:
+        arrays.update(_commute_arrays(ants, commutes, sim.tick))
+    arrays["building_xy"] = np.array([(b.x, b.y) for b in sim.buildings], dtype=np.int32).reshape(-1, 2)
+    arrays["building_type"] = _type_codes(sim.buildings, building_types)
+    arrays["source_xy"] = np.array([(s.x, s.y) for s in sources], dtype=np.int32).reshape(-1, 2)
+    arrays["source_type"] = _type_codes(sources, source_types)
+    arrays["area_box"] = np.array([(a.x, a.y, a.w, a.h) for a in sim.areas], dtype=np.int32).reshape(-1, 4)
+    arrays["area_type"] = _type_codes(sim.areas, area_types)
+    arrays["area_point_count"] = np.array([len(a.points) for a in sim.areas], dtype=np.int32)
+    arrays["area_points"] = np.array([p for a in sim.areas for p in a.points], dtype=np.int32).reshape(-1, 2)
+
+    meta = {
+        "seed": sim.seed,
+        "tick": sim.tick,
+        "width": sim.width,
+        "height": sim.height,
+        "ant_count": sim.ant_count,
+        "resources": sim.resources,
+        "source_counts": [len(sim.food_sources), len(sim.lumber_areas), len(sim.water_areas)],
+        "building_types": building_types,
+        "source_types": source_types,
+        "area_types": area_types,
+        "queen": {
+            "x": sim.queen.x,
+            "y": sim.queen.y,
+            "hunger": sim.queen.hunger,
+            "lay_timer": sim.queen.lay_timer,
+            "status": sim.queen.status,
+        },
+        "build_log": sim.build_log,
+        "rng": {
+            "world": _rng_state(sim.streams.world),
+            "ai": _rng_state(sim.streams.ai),
+        },
+    }
+    if commutes is not None:
+        meta["commutes"] = {"names": commutes["names"], "next_seq": commutes["next_seq"], "drift": commutes["drift"]}
+    if sim.auto_player is not None:
+        meta["auto_player"] = {
+            "last_building_time": sim.auto_player.last_building_time,
+            "last_analysis_time": sim.auto_player.last_analysis_time,
+        }
+    return meta, arrays
+
+
+def save_snapshot(sim, path):
+    # Layout: magic, header length, JSON header, then each array's raw bytes
+    # at a 64-byte aligned offset so open_snapshot can memory-map them.
+    meta, arrays = _collect(sim)
+    layout = {}
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[name] = arr
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset = _align(offset + arr.nbytes)
+    header = json.dumps({"version": VERSION, "meta": meta, "arrays": layout}, separators=(",", ":")).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    # Write beside the target and swap it in, so a crash mid-save never
+    # leaves a truncated snapshot behind.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(arr.data)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class BackgroundSaver:
+    # Periodic saves without a frame hitch: a forked child writes the
+    # snapshot from its copy of the simulation, frozen as it was at the
+    # fork, so the caller only pays for the fork (about 6 ms at 100k ants
+    # against about 0.7 s for save_snapshot on the object engine). Where
+    # os.fork is missing, e.g. on Windows, it saves in the foreground.
+    def __init__(self):
+        self._pid = None
+
+    def busy(self):
+        if self._pid is None:
+            return False
+        pid, status = os.waitpid(self._pid, os.WNOHANG)
+        if pid == 0:
+            return True
+        self._pid = None
+        if os.waitstatus_to_exitcode(status):
+            print("Background save failed")
+        return False
+
+    def save(self, sim, path):
+        # False, without saving, while the previous save is still running.
+        if self.busy():
+            return False
+        if not hasattr(os, "fork"):
+            save_snapshot(sim, path)
+            return True
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                save_snapshot(sim, path)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            os._exit(code)
+        self._pid = pid
+        return True
+
+    def wait(self):
+        # Block until a running save has finished, e.g. before saving or
+        # loading the same path in the foreground.
+        if self._pid is not None:
+            os.waitpid(self._pid, 0)
+            self._pid = None
+
+
+def open_snapshot(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a colony snapshot")
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported snapshot version: {header['version']}")
+    data_start = _align(len(MAGIC) + 8 + header_size)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if np.prod(shape) == 0:
+            arrays[name] = np.empty(shape, dtype=spec["dtype"])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r", offset=data_start + spec["offset"], shape=shape)
+    return header["meta"], arrays
+
+
+def load_snapshot(path, sim_class=VectorSimulation, auto_player=None):
+    meta, arrays = open_snapshot(path)
+    width, height = meta["width"], meta["height"]
+    sim = sim_class(0, width, height, seed=meta["seed"])
+    sim.tick = meta["tick"]
+    sim.ant_count = meta["ant_count"]
+    sim.resources = dict(meta["resources"])
+    sim.build_log = [tuple(entry) for entry in meta["build_log"]]
+    for name, state in meta["rng"].items():
+        # Older snapshots also carry an "ants" stream that is no longer used.
+        if hasattr(sim.streams, name):
+            _set_rng_state(getattr(sim.streams, name), state)
+
+    area_types = meta["area_types"]
+    areas = []
+    start = 0
+    for (x, y, w, h), code, count in zip(arrays["area_box"].tolist(), arrays["area_type"].tolist(), arrays["area_point_count"].tolist()):
+        points = [tuple(p) for p in arrays["area_points"][start:start + count].tolist()]
+        areas.append(Area.from_points(x, y, w, h, area_types[code], points))
+        start += count
+    sim.areas = areas
+    sim.terrain = TerrainMap(width, height, areas)
+
+    source_types = meta["source_types"]
+    sources = [FoodSource(x, y, source_types[code]) for (x, y), code in zip(arrays["source_xy"].tolist(), arrays["source_type"].tolist())]
+    food_count, lumber_count, _ = meta["source_counts"]
+    sim.food_sources = sources[:food_count]
+    sim.lumber_areas = sources[food_count:food_count + lumber_count]
+    sim.water_areas = sources[food_count + lumber_count:]
+
+    building_types = meta["building_types"]
+    buildings = [Building(x, y, building_types[code]) for (x, y), code in zip(arrays["building_xy"].tolist(), arrays["building_type"].tolist())]
+    sim.buildings = BuildingRegistry(buildings, raster=NearestRaster(width, height))
+
+    queen = meta["queen"]
+    sim.queen = Queen(queen["x"], queen["y"])
+    sim.queen.hunger = queen["hunger"]
+    sim.queen.lay_timer = queen["lay_timer"]
+    sim.queen.status = queen["status"]
+
+    ants = AntArrays.from_arrays({name: arrays["ant_" + name] for name in AntArrays.FIELDS})
+    if isinstance(sim, VectorSimulation):
+        sim.index_sources()
+        sim.ants = ants
+        sim.stats = ColonyStats(sim.buildings)
+        sim.refresh_stats()
+    else:
+        if "ant_slot" in arrays:
+            pool = {"slots": arrays["ant_slot"].tolist(), "generations": arrays["ant_pool_generation"].tolist(), "free": arrays["ant_pool_free"].tolist()}
+            sim.ants = EntityPool.restore(ants.to_ants(sources), pool)
+        else:
+            sim.ants = EntityPool(ants.to_ants(sources))
+        if "ant_home" in arrays:
+            for ant, home in zip(sim.ants, arrays["ant_home"].tolist()):
+                ant.home = home if home >= 0 else None
+        sim.stats = ColonyStats(sim.buildings, sim.ants)
+        if "commute_wake" in arrays:
+            state = dict(
+                meta["commutes"],
+                awake=arrays["commute_awake"],
+                sleepers=arrays["commute_ant"],
+                seq=arrays["commute_seq"],
+                start=arrays["commute_start"],
+                wake=arrays["commute_wake"],
+                origin=arrays["commute_origin"],
+                rates=arrays["commute_rates"],
+            )
+            sim.commutes = CommuteScheduler.restore(sim.ants, state, key=sim.ants.position)
+        else:
+            sim.commutes = CommuteScheduler(sim.ants, key=sim.ants.position)
+        sim.ant_grid = AntGrid(sim.commutes.awake)
+        for ant in sim.commutes.sleepers():
+            sim.ant_grid.place_path(ant, *sim.commutes.path(ant))
+    sim.jobs = JobBoard(sources)
+    sim.jobs.recount(ants.target)
+    sim.index_slots()
+
+    if auto_player is not None:
+        auto_player.rng = sim.streams.ai
+        auto_player.width, auto_player.height = width, height
+        state = meta.get("auto_player", {})
+        auto_player.last_building_time = state.get("last_building_time", 0)
+        auto_player.last_analysis_time = state.get("last_analysis_time", 0)
+        sim.auto_player = auto_player
+    return sim
@@ -0,0 +1,27 @@
+import math
+
+import pygame
+
+
+class RotatedSpriteCache:
+    def __init__(self, image, steps=64):
+        self.image = image
+        self.steps = steps
+        self._frames = None
+
+    def _build(self):
+        frames = []
+        convert = pygame.display.get_surface() is not None
+        for i in range(self.steps):
+            rotated = pygame.transform.rotate(self.image, i * 360 / self.steps)
+            if convert:
+                rotated = rotated.convert_alpha()
+            offset = (-(rotated.get_width() // 2), -(rotated.get_height() // 2))
+            frames.append((rotated, offset))
+        self._frames = frames
+
+    def frame(self, dx, dy):
+        if self._frames is None:
+            self._build()
+        angle = math.degrees(math.atan2(-dx, -dy))
+        return self._frames[round(angle * self.steps / 360) % self.steps]
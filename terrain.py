@@ -0,0 +1,90 @@
+import numpy as np
+
+TERRAIN_TYPES = (None, "water", "lumber", "mountain", "sand", "flowers", "grass")
+TERRAIN_CODES = {name: code for code, name in enumerate(TERRAIN_TYPES)}
+
+
+class TerrainMap:
+    # Label raster of area types plus a "near a water edge" mask, both built
+    # once per world so placement checks and AI sampling are array lookups.
+    def __init__(self, width, height, areas, cell_size=4, shore_distance=20):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.shore_distance = shore_distance
+        self.cols = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self._centre_x = (np.arange(self.cols, dtype=np.float64) + 0.5) * cell_size
+        self._centre_y = (np.arange(self.rows, dtype=np.float64) + 0.5) * cell_size
+        self.labels = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        self.shore = np.zeros((self.rows, self.cols), dtype=bool)
+        self._cells = {}
+        for area in areas:
+            self._add_area(area)
+
+    def _window(self, rect, margin):
+        c0 = max(0, int((rect.left - margin) // self.cell_size))
+        c1 = min(self.cols, int((rect.right + margin) // self.cell_size) + 1)
+        r0 = max(0, int((rect.top - margin) // self.cell_size))
+        r1 = min(self.rows, int((rect.bottom + margin) // self.cell_size) + 1)
+        return r0, r1, c0, c1
+
+    def _add_area(self, area):
+        points = area.points
+        edges = list(zip(points, points[1:] + points[:1]))
+
+        r0, r1, c0, c1 = self._window(area.rect, 0)
+        x = self._centre_x[None, c0:c1]
+        y = self._centre_y[r0:r1, None]
+        inside = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+        for (x1, y1), (x2, y2) in edges:
+            if y1 == y2:
+                continue
+            crosses = (y1 < y) != (y2 < y)
+            inside ^= crosses & (x <= x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+        self.labels[r0:r1, c0:c1][inside] = TERRAIN_CODES.get(area.type, 0)
+
+        if area.type != "water":
+            return
+        r0, r1, c0, c1 = self._window(area.rect, self.shore_distance)
+        x = self._centre_x[None, c0:c1]
+        y = self._centre_y[r0:r1, None]
+        dist2 = np.full((r1 - r0, c1 - c0), np.inf)
+        for (x1, y1), (x2, y2) in edges:
+            dx, dy = x2 - x1, y2 - y1
+            length2 = dx * dx + dy * dy
+            if length2 == 0:
+                t = 0
+            else:
+                t = np.clip(((x - x1) * dx + (y - y1) * dy) / length2, 0, 1)
+            dist2 = np.minimum(dist2, (x - (x1 + t * dx)) ** 2 + (y - (y1 + t * dy)) ** 2)
+        self.shore[r0:r1, c0:c1] |= dist2 <= self.shore_distance ** 2
+
+    def _cell(self, x, y):
+        col = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row, col
+        return None
+
+    def near_shore(self, x, y):
+        cell = self._cell(x, y)
+        return cell is not None and bool(self.shore[cell])
+
+    def cells(self, name):
+        # Flat indices of the cells in a named mask, computed on first use.
+        cells = self._cells.get(name)
+        if cells is None:
+            if name == "shore land":
+                mask = self.shore & (self.labels != TERRAIN_CODES["water"])
+            else:
+                mask = self.labels == TERRAIN_CODES[name]
+            cells = self._cells[name] = np.flatnonzero(mask)
+        return cells
+
+    def random_point(self, name, rng):
+        cells = self.cells(name)
+        if not len(cells):
+            return None
+        row, col = divmod(int(cells[rng.randrange(len(cells))]), self.cols)
+        return int(self._centre_x[col]), int(self._centre_y[row])
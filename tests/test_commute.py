@@ -0,0 +1,45 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import math
+
+from ant_colony import Ant, Simulation
+from auto_player import AutoPlayer
+
+TICKS = 1500
+EXACT = ("hunger", "stamina", "age", "state", "carrying", "school_target", "home")
+
+
+def _awake_ants(sim):
+    # Sleepers' fields are stale until they wake, so only awake ants count.
+    sources = {id(s): i for i, s in enumerate(sim.jobs.sources)}
+    return {
+        ant.handle: (ant.x, ant.y, sources.get(id(ant.target), -1)) + tuple(getattr(ant, name) for name in EXACT)
+        for ant in sim.ants
+        if ant.commute is None
+    }
+
+
+def _run(ticks):
+    sim = Simulation(50, seed=3)
+    sim.auto_player = AutoPlayer(sim.streams.ai, sim.width, sim.height)
+    for _ in range(ticks):
+        sim.step()
+        yield _awake_ants(sim), dict(sim.resources), len(sim.commutes)
+
+
+def test_sleeping_matches_updating_every_tick(monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(Ant, "plan_commute", lambda ant, buildings, slots: None)
+        expected = list(_run(TICKS))
+    slept = 0
+    for tick, ((ants, resources, asleep), (want, want_resources, _)) in enumerate(zip(_run(TICKS), expected)):
+        slept = max(slept, asleep)
+        assert resources == want_resources, tick
+        for handle, ant in ants.items():
+            other = want[handle]
+            assert math.isclose(ant[0], other[0], abs_tol=1e-6) and math.isclose(ant[1], other[1], abs_tol=1e-6), (tick, handle)
+            assert ant[2:] == other[2:], (tick, handle)
+    assert slept
@@ -0,0 +1,51 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from ant_colony import FoodSource, Simulation
+from job_board import JobBoard
+from vector_engine import AntArrays, VectorSimulation
+
+FIELDS = ("x", "y", "hunger", "stamina", "carrying", "target", "resting", "eating")
+
+
+def _single_source(sim_class):
+    sim = sim_class(2, seed=1)
+    base = sim.buildings.first("base")
+    sim.food_sources, sim.lumber_areas, sim.water_areas = [FoodSource(base.x + 3, base.y)], [], []
+    sim.jobs = JobBoard(sim.food_sources)
+    if sim_class is VectorSimulation:
+        sim.index_sources()
+    sim.step(100)
+    return sim.resources
+
+
+def test_delivery_and_gathering_are_separate_ticks():
+    assert _single_source(VectorSimulation) == _single_source(Simulation)
+
+
+def test_engines_agree_ant_by_ant():
+    objects = Simulation(20, seed=3)
+    vectors = VectorSimulation(20, seed=3)
+    for _ in range(500):
+        objects.step()
+        vectors.step()
+        expected = AntArrays.from_ants(list(objects.settle_ants()), objects.jobs.sources)
+        for name in FIELDS:
+            np.testing.assert_allclose(getattr(vectors.ants, name), getattr(expected, name), err_msg=name)
+        assert vectors.resources == objects.resources
+
+
+def test_engines_agree_on_totals():
+    # Near-ties between sources break differently after rounding, so large
+    # colonies are compared by what they collect rather than ant by ant.
+    objects = Simulation(2000, seed=3)
+    vectors = VectorSimulation(2000, seed=3)
+    objects.step(600)
+    vectors.step(600)
+    assert len(vectors.ants) == len(objects.ants)
+    for name, amount in objects.resources.items():
+        assert abs(vectors.resources[name] - amount) <= 0.1 * amount, name
@@ -0,0 +1,425 @@
+import argparse
+import time
+from operator import attrgetter
+
+import numpy as np
+
+from ant_colony import (
+    ANT_COUNT, FPS, HEIGHT, WIDTH, Ant, Simulation,
+    GATHERING, HAULING, RESTING, EATING, STUDYING,
+    CARRY_NONE, CARRY_WOOD, CARRY_FISH, CARRY_CODES,
+)
+from capacity import CapacityIndex
+
+
+class AntArrays:
+    FIELDS = {
+        "x": np.float64,
+        "y": np.float64,
+        "speed": np.float64,
+        "stamina": np.float64,
+        "hunger": np.float64,
+        "experience": np.float64,
+        "age": np.float64,
+        "unhappy_ticks": np.int32,
+        "last_dx": np.float64,
+        "last_dy": np.float64,
+        "is_adult": np.bool_,
+        "resting": np.bool_,
+        "eating": np.bool_,
+        "at_school": np.bool_,
+        "carrying": np.int8,
+        "target": np.int32,
+        # Handle of the school a child has a place at, -1 for none.
+        "school": np.int32,
+    }
+    # Values for fields missing from arrays saved before they existed.
+    DEFAULTS = {"school": -1}
+    # Fields copied as they are from Ant attributes of the same name.
+    COPIED = (
+        "x", "y", "speed", "stamina", "hunger", "experience", "age",
+        "unhappy_ticks", "last_dx", "last_dy", "is_adult", "carrying",
+    )
+
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.capacity = max(1, capacity)
+        for name, dtype in self.FIELDS.items():
+            setattr(self, "_" + name, np.zeros(self.capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        if name in AntArrays.FIELDS:
+            return self.__dict__["_" + name][:self.count]
+        raise AttributeError(name)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, "_" + name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, "_" + name, new)
+        self.capacity = capacity
+
+    def spawn(self, n, x, y, is_adult=False):
+        if n <= 0:
+            return
+        if self.count + n > self.capacity:
+            self._grow(self.count + n)
+        s = slice(self.count, self.count + n)
+        self._x[s] = x
+        self._y[s] = y
+        self._speed[s] = 1 if is_adult else 0.5
+        self._stamina[s] = 100
+        self._hunger[s] = 0
+        self._experience[s] = 0
+        self._age[s] = 0
+        self._unhappy_ticks[s] = 0
+        self._last_dx[s] = 0
+        self._last_dy[s] = -1
+        self._is_adult[s] = is_adult
+        self._resting[s] = False
+        self._eating[s] = False
+        self._at_school[s] = False
+        self._carrying[s] = CARRY_NONE
+        self._target[s] = -1
+        self._school[s] = -1
+        self.count += n
+
+    def compact(self, keep):
+        n = int(np.count_nonzero(keep))
+        for name in self.FIELDS:
+            arr = getattr(self, "_" + name)
+            arr[:n] = arr[:self.count][keep]
+        self.count = n
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        count = len(arrays["x"])
+        ants = cls(count)
+        for name in cls.FIELDS:
+            getattr(ants, "_" + name)[:count] = arrays[name] if name in arrays else cls.DEFAULTS[name]
+        ants.count = count
+        return ants
+
+    @classmethod
+    def from_ants(cls, ants, sources):
+        # Field by field with np.fromiter and the rest as array work, so
+        # converting a large colony (e.g. for a snapshot) takes milliseconds.
+        ants = list(ants)
+        count = len(ants)
+        arrays = cls(count)
+        arrays.spawn(count, 0, 0)
+        for name in cls.COPIED:
+            getattr(arrays, name)[:] = np.fromiter(map(attrgetter(name), ants), arrays.FIELDS[name], count)
+        state = np.fromiter(map(attrgetter("state"), ants), np.int8, count)
+        resume = np.fromiter(map(attrgetter("resume"), ants), np.int8, count)
+        interrupted = (state == EATING) | (state == STUDYING)
+        arrays.resting[:] = (state == RESTING) | (interrupted & (resume == RESTING))
+        arrays.eating[:] = state == EATING
+        arrays.at_school[:] = state == STUDYING
+        source_index = {id(s): i for i, s in enumerate(sources)}
+        arrays.target[:] = [source_index.get(id(ant.target), -1) for ant in ants]
+        arrays.school[:] = [-1 if ant.school_target is None else ant.school_target for ant in ants]
+        return arrays
+
+    def to_ants(self, sources, index=None):
+        # Columns come out as Python lists in one go and states are worked
+        # out as arrays, so the loop only builds the Ant objects.
+        rows = slice(None) if index is None else index
+        columns = [getattr(self, name)[rows].tolist() for name in self.COPIED]
+        base = np.where(self.carrying[rows] != CARRY_NONE, HAULING, GATHERING)
+        base[self.resting[rows]] = RESTING
+        at_school = self.at_school[rows]
+        eating = self.eating[rows]
+        state = np.where(at_school, STUDYING, np.where(eating, EATING, base))
+        resume = np.where(at_school | eating, base, GATHERING)
+        columns += [state.tolist(), resume.tolist(), self.target[rows].tolist(), self.school[rows].tolist()]
+        ants = []
+        for (x, y, speed, stamina, hunger, experience, age, unhappy_ticks, last_dx, last_dy, is_adult, carrying,
+             state, resume, target, school) in zip(*columns):
+            ant = Ant(x, y, is_adult)
+            ant.speed = speed
+            ant.stamina = stamina
+            ant.hunger = hunger
+            ant.experience = experience
+            ant.age = age
+            ant.unhappy_ticks = unhappy_ticks
+            ant.last_dx = last_dx
+            ant.last_dy = last_dy
+            ant.carrying = carrying
+            ant.state = state
+            ant.resume = resume
+            ant.target = sources[target] if target >= 0 else None
+            ant.school_target = school if school >= 0 else None
+            ants.append(ant)
+        return ants
+
+
+def nearest_index(px, py, bx, by):
+    chunk = max(1, (1 << 20) // max(1, len(bx)))
+    result = np.empty(len(px), dtype=np.intp)
+    for start in range(0, len(px), chunk):
+        stop = start + chunk
+        d2 = (px[start:stop, None] - bx[None, :]) ** 2 + (py[start:stop, None] - by[None, :]) ** 2
+        result[start:stop] = np.argmin(d2, axis=1)
+    return result
+
+
+class VectorSimulation(Simulation):
+    def __init__(self, ant_count=ANT_COUNT, width=WIDTH, height=HEIGHT, seed=None):
+        super().__init__(ant_count, width, height, seed)
+        # Ants get no homes here, so housing is estimated from the homes.
+        self.stats.slots = None
+        self.index_sources()
+        self.ants = AntArrays.from_ants(self.ants, self.sources)
+
+    def index_sources(self):
+        self.sources = self.food_sources + self.lumber_areas + self.water_areas
+        self.source_x = np.array([s.x for s in self.sources], dtype=np.float64)
+        self.source_y = np.array([s.y for s in self.sources], dtype=np.float64)
+        self.source_type = np.array([CARRY_CODES[s.type] for s in self.sources], dtype=np.int8)
+        self._building_cache_size = -1
+        self._building_xy = {}
+        self._building_handles = {}
+
+    def sync_ants(self):
+        return self.ants.to_ants(self.sources)
+
+    def visible_ants(self, rect):
+        a = self.ants
+        inside = (a.x >= rect.left) & (a.x < rect.right) & (a.y >= rect.top) & (a.y < rect.bottom)
+        return self.ants.to_ants(self.sources, np.flatnonzero(inside))
+
+    def _buildings_of(self, building_type):
+        if self._building_cache_size != len(self.buildings):
+            self._building_xy = {}
+            self._building_handles = {}
+            self._building_cache_size = len(self.buildings)
+        positions = self._building_xy.get(building_type)
+        if positions is None:
+            positions = np.array([(b.x, b.y) for b in self.buildings.of_type(building_type)], dtype=np.float64).reshape(-1, 2)
+            self._building_xy[building_type] = positions
+        return positions
+
+    def _positions_of(self, handles, building_type):
+        # Positions of buildings by handle. Buildings are never removed, so
+        # handles grow in placement order and a sorted search finds them.
+        positions = self._buildings_of(building_type)
+        known = self._building_handles.get(building_type)
+        if known is None:
+            known = np.array([b.handle for b in self.buildings.of_type(building_type)], dtype=np.int64)
+            self._building_handles[building_type] = known
+        rows = positions[np.searchsorted(known, handles)]
+        return rows[:, 0], rows[:, 1]
+
+    def index_slots(self):
+        # Schools only: the vector engine does not give ants homes.
+        self.slots = CapacityIndex()
+        self._buildings_seen = 0
+        self._track_buildings()
+        school = self.ants.school
+        for handle in school[school >= 0].tolist():
+            self.slots.claim(handle)
+
+    def _nearest(self, idx, types):
+        a = self.ants
+        px = a.x[idx]
+        py = a.y[idx]
+        tx = np.zeros(len(idx))
+        ty = np.zeros(len(idx))
+        which = np.full(len(idx), -1, dtype=np.intp)
+        best = np.full(len(idx), np.inf)
+        raster = self.buildings.raster
+        for t in types:
+            positions = self._buildings_of(t)
+            if not len(positions):
+                continue
+            if raster is not None:
+                nearest = raster.lookup_many(t, px, py)
+            else:
+                nearest = nearest_index(px, py, positions[:, 0], positions[:, 1])
+            bx = positions[nearest, 0]
+            by = positions[nearest, 1]
+            d2 = (bx - px) ** 2 + (by - py) ** 2
+            closer = d2 < best
+            tx[closer] = bx[closer]
+            ty[closer] = by[closer]
+            which[closer] = nearest[closer]
+            best[closer] = d2[closer]
+        return tx, ty, which
+
+    def _move(self, idx, tx, ty):
+        a = self.ants
+        dx = tx - a.x[idx]
+        dy = ty - a.y[idx]
+        dist = np.maximum(1, np.sqrt(dx * dx + dy * dy))
+        ux = dx / dist
+        uy = dy / dist
+        a.x[idx] += a.speed[idx] * ux
+        a.y[idx] += a.speed[idx] * uy
+        moved = (np.abs(dx) > 1e-3) | (np.abs(dy) > 1e-3)
+        a.last_dx[idx[moved]] = ux[moved]
+        a.last_dy[idx[moved]] = uy[moved]
+        return (np.abs(a.x[idx] - tx) < 5) & (np.abs(a.y[idx] - ty) < 5)
+
+    def _update_ants(self):
+        a = self.ants
+        resources = self.resources
+        n = len(a)
+        a.age[:] += 1 / FPS
+
+        graduates = ~a.is_adult & (a.experience >= 200)
+        a.is_adult[graduates] = True
+        a.speed[graduates] = 1
+        a.at_school[graduates] = False
+        self._leave_school(graduates)
+
+        done = np.zeros(n, dtype=bool)
+
+        schooling = ~a.is_adult & a.at_school
+        a.experience[schooling] += 0.1
+        done |= schooling
+
+        seekers = np.flatnonzero(~a.is_adult & ~a.at_school)
+        if len(seekers):
+            # Only claims happen one at a time, and there are never more of
+            # those than places freed.
+            waiting = seekers[a.school[seekers] < 0]
+            for i in waiting[:self.slots.free("school")].tolist():
+                a.school[i] = self.slots.claim_nearest("school", a.x[i], a.y[i])
+            walkers = seekers[a.school[seekers] >= 0]
+            if len(walkers):
+                tx, ty = self._positions_of(a.school[walkers], "school")
+                arrived = self._move(walkers, tx, ty)
+                a.at_school[walkers[arrived]] = True
+                done[walkers[arrived]] = True
+
+        active = ~done
+        a.hunger[active] = np.minimum(100, a.hunger[active] + 0.01)
+
+        hungry_mask = active & ((a.hunger >= 70) | a.eating)
+        hungry = np.flatnonzero(hungry_mask)
+        if len(hungry):
+            food_types = ("home",)
+            if resources["food"] > 0 or resources["fish"] > 0:
+                food_types = ("home", "fishing hut")
+            if any(self.buildings.count(t) for t in food_types):
+                tx, ty, _ = self._nearest(hungry, food_types)
+                arrived = self._move(hungry, tx, ty)
+                a.eating[hungry[~arrived]] = True
+                eaters = hungry[arrived]
+                fed_food = min(len(eaters), resources["food"])
+                fed_fish = min(len(eaters) - fed_food, resources["fish"])
+                resources["food"] -= fed_food
+                resources["fish"] -= fed_fish
+                fed = eaters[:fed_food + fed_fish]
+                a.hunger[fed] = np.maximum(0, a.hunger[fed] - 15)
+                a.eating[fed] = False
+                a.eating[eaters[fed_food + fed_fish:]] = True
+            else:
+                a.eating[hungry] = True
+        a.eating[active & ~hungry_mask] = False
+        active &= ~hungry_mask
+
+        a.resting[active & (a.stamina <= 20)] = True
+        resting = np.flatnonzero(active & a.resting)
+        a.stamina[active & ~a.resting] -= 0.01
+        if len(resting):
+            hub = self.buildings.first("hub")
+            if hub:
+                arrived = self._move(resting, hub.x, hub.y)
+                recovering = resting[arrived]
+                a.stamina[recovering] = np.minimum(100, a.stamina[recovering] + 3)
+                a.resting[recovering[a.stamina[recovering] >= 80]] = False
+                active[recovering] = False
+            else:
+                a.stamina[resting] = np.minimum(100, a.stamina[resting] + 1)
+                active[resting] = False
+
+        # Taken before the carriers move, so an ant that delivers does not
+        # also set out for a source on the same tick.
+        gatherers = np.flatnonzero(active & (a.carrying == CARRY_NONE))
+        carriers = np.flatnonzero(active & (a.carrying != CARRY_NONE))
+        if len(carriers):
+            base = self.buildings.first("base")
+            drop_x = np.full(len(carriers), base.x, dtype=np.float64)
+            drop_y = np.full(len(carriers), base.y, dtype=np.float64)
+            for code, building_type in ((CARRY_FISH, "fishing hut"), (CARRY_WOOD, "lumber camp")):
+                sel = a.carrying[carriers] == code
+                if self.buildings.count(building_type) and sel.any():
+                    drop_x[sel], drop_y[sel], _ = self._nearest(carriers[sel], (building_type,))
+            arrived = self._move(carriers, drop_x, drop_y)
+            delivered = np.bincount(a.carrying[carriers[arrived]], minlength=4)
+            for name, code in CARRY_CODES.items():
+                resources[name] += int(delivered[code])
+            a.carrying[carriers[arrived]] = CARRY_NONE
+
+        if len(gatherers) and len(self.sources):
+            idle = gatherers[a.target[gatherers] < 0]
+            a.target[idle] = self.jobs.assign(a.x[idle], a.y[idle], self.buildings, resources)
+            targets = a.target[gatherers]
+            arrived = self._move(gatherers, self.source_x[targets], self.source_y[targets])
+            a.carrying[gatherers[arrived]] = self.source_type[targets[arrived]]
+            self.jobs.unclaim(targets[arrived])
+            a.target[gatherers[arrived]] = -1
+
+    def refresh_stats(self, happy=None):
+        a = self.ants
+        if happy is None:
+            happy = (a.hunger < 80) & (a.stamina > 20)
+        self.stats.set_totals(
+            len(a),
+            int(np.count_nonzero(a.is_adult)),
+            int(np.count_nonzero(happy)),
+            float(a.hunger.sum()),
+            float(a.stamina.sum()),
+        )
+
+    def _leave_school(self, mask):
+        a = self.ants
+        leaving = a.school[mask]
+        for handle in leaving[leaving >= 0].tolist():
+            self.slots.release(handle)
+        a.school[mask] = -1
+
+    def update_ants(self):
+        a = self.ants
+        if self._buildings_seen != len(self.buildings):
+            self._track_buildings()
+        self._update_ants()
+
+        happy = (a.hunger < 80) & (a.stamina > 20)
+        a.unhappy_ticks[happy] = 0
+        a.unhappy_ticks[~happy] += 1
+        starved = a.unhappy_ticks > FPS * 20
+        if starved.any():
+            self.jobs.unclaim(a.target[starved])
+            self._leave_school(starved)
+            a.compact(~starved)
+            happy = happy[~starved]
+        self.refresh_stats(happy)
+
+    def add_child(self, x, y):
+        # Only called when every ant is happy, and a newborn is too.
+        self.ants.spawn(1, x, y, is_adult=False)
+        self.refresh_stats(np.ones(len(self.ants), dtype=bool))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the NumPy ant engine headless")
+    parser.add_argument("--ticks", type=int, default=FPS * 60)
+    parser.add_argument("--ants", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    sim = VectorSimulation(args.ants, seed=args.seed)
+    start = time.perf_counter()
+    sim.step(args.ticks)
+    elapsed = time.perf_counter() - start
+    print(f"{args.ticks} ticks with {args.ants} ants in {elapsed:.2f}s ({args.ticks / elapsed:.1f} ticks/s)")
+    print(f"Ants: {len(sim.ants)}  Resources: {sim.resources}")
@@ -0,0 +1,78 @@
+import math
+
+
+class RectGrid:
+    def __init__(self, cell_size=256):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+
+    def _cells(self, rect):
+        cell = self.cell_size
+        for cx in range(rect.left // cell, (rect.right - 1) // cell + 1):
+            for cy in range(rect.top // cell, (rect.bottom - 1) // cell + 1):
+                yield cx, cy
+
+    def add(self, rect, item=None):
+        entry = (self.count, rect, rect if item is None else item)
+        self.count += 1
+        for key in self._cells(rect):
+            self.cells.setdefault(key, []).append(entry)
+
+    def collides(self, rect):
+        cells = self.cells
+        for key in self._cells(rect):
+            for _, other, _ in cells.get(key, ()):
+                if rect.colliderect(other):
+                    return True
+        return False
+
+    def query(self, rect):
+        # Items whose rect meets `rect`, in the order they were added.
+        found = {}
+        cells = self.cells
+        for key in self._cells(rect):
+            for entry in cells.get(key, ()):
+                if entry[0] not in found and rect.colliderect(entry[1]):
+                    found[entry[0]] = entry[2]
+        return [found[i] for i in sorted(found)]
+
+
+class PoissonDisk:
+    # Dart throwing against a background grid: every accepted point is at
+    # least `radius` from all others, and each candidate only looks at the
+    # 5x5 block of cells around it, so cost grows with the number of points
+    # rather than the map size.
+    def __init__(self, radius):
+        self.radius = radius
+        self.cell_size = radius / math.sqrt(2)
+        self.cells = {}
+
+    def _key(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def fits(self, x, y):
+        cx, cy = self._key(x, y)
+        r2 = self.radius * self.radius
+        cells = self.cells
+        for i in range(cx - 2, cx + 3):
+            for j in range(cy - 2, cy + 3):
+                other = cells.get((i, j))
+                if other is not None and (other[0] - x) ** 2 + (other[1] - y) ** 2 < r2:
+                    return False
+        return True
+
+    def add(self, x, y):
+        self.cells[self._key(x, y)] = (x, y)
+
+    def sample(self, count, x0, y0, x1, y1, rng, attempts=30):
+        points = []
+        for _ in range(count):
+            for _ in range(attempts):
+                x = rng.randint(x0, x1)
+                y = rng.randint(y0, y1)
+                if self.fits(x, y):
+                    self.add(x, y)
+                    points.append((x, y))
+                    break
+        return points